@@ -2,14 +2,18 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
+from app.db_routing import REPLICA, RoutingSession
+from app.json_provider import OrjsonProvider, orjson
 import os
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
-def create_app(database_url=None):
+def create_app(database_url=None, replica_url=None):
     app = Flask(__name__)
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
     CORS(app)  # Enable Cross-Origin Resource Sharing for all routes
 
     # Configure the Flask application
@@ -19,21 +23,54 @@ def create_app(database_url=None):
     if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
         app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://', 1)
 
+    # Read replica for read-only API views (see app/db_routing.py), used while it is at most
+    # REPLICA_MAX_LAG_SECONDS behind ingest; without one everything uses the primary
+    replica_url = replica_url or os.getenv('DATABASE_REPLICA_URL')
+    if replica_url:
+        app.config['SQLALCHEMY_BINDS'] = {REPLICA: replica_url.replace('postgres://', 'postgresql://', 1)}
+    app.config['REPLICA_MAX_LAG_SECONDS'] = int(os.getenv('REPLICA_MAX_LAG_SECONDS', 30))
+
     # General SQLAlchemy settings
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev')
 
+    # Price history storage: 'verbose' {price, timestamp} objects or 'packed' [epoch, price] arrays,
+    # with raw points kept for PRICE_HISTORY_RAW_DAYS, then daily and weekly aggregates
+    app.config['PRICE_HISTORY_FORMAT'] = os.getenv('PRICE_HISTORY_FORMAT', 'verbose')
+    app.config['PRICE_HISTORY_RAW_DAYS'] = int(os.getenv('PRICE_HISTORY_RAW_DAYS', 30))
+    app.config['PRICE_HISTORY_DAILY_DAYS'] = int(os.getenv('PRICE_HISTORY_DAILY_DAYS', 365))
+    app.config['PRICE_HISTORY_WEEKLY_DAYS'] = int(os.getenv('PRICE_HISTORY_WEEKLY_DAYS', 0))
+
+    # Responses of at least COMPRESS_MIN_SIZE bytes are gzip/brotli compressed; static files
+    # requested without their content hash are cached for STATIC_MAX_AGE seconds
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 500))
+    app.config['STATIC_MAX_AGE'] = int(os.getenv('STATIC_MAX_AGE', 300))
+
+    # Change feed (/api/v1/changes/stream): streams end after CHANGE_STREAM_TIMEOUT seconds, below
+    # gunicorn's default 30s worker timeout, and EventSource clients resume with Last-Event-ID
+    app.config['CHANGE_STREAM_POLL_SECONDS'] = float(os.getenv('CHANGE_STREAM_POLL_SECONDS', 2))
+    app.config['CHANGE_STREAM_TIMEOUT'] = int(os.getenv('CHANGE_STREAM_TIMEOUT', 25))
+    app.config['CHANGE_LOG_RETENTION_DAYS'] = int(os.getenv('CHANGE_LOG_RETENTION_DAYS', 90))
+
+    # Product image proxy (/api/v1/images/<id>): thumbnails of images on the sites' image_hosts
+    # (plus IMAGE_PROXY_HOSTS) are cached by IMAGE_CACHE_THREADS background threads under
+    # IMAGE_CACHE_DIR, up to IMAGE_CACHE_MAX_MB
+    app.config['IMAGE_CACHE_DIR'] = os.getenv('IMAGE_CACHE_DIR', os.path.join(app.instance_path, 'image_cache'))
+    app.config['IMAGE_CACHE_MAX_MB'] = int(os.getenv('IMAGE_CACHE_MAX_MB', 200))
+    app.config['IMAGE_CACHE_THREADS'] = int(os.getenv('IMAGE_CACHE_THREADS', 2))
+    app.config['IMAGE_PROXY_HOSTS'] = [host.strip() for host in os.getenv('IMAGE_PROXY_HOSTS', '').split(',') if host.strip()]
+
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
 
     with app.app_context():
         # Import models
-        from app.models.models import Platform, Category
+        from app.models.models import Platform, Category, DataVersion
         
-        # Create all database tables
+        # Create all database tables on the primary (replicas get them through replication)
         try:
-            db.create_all()
+            db.create_all(bind_key=None)
         except Exception as e:
             app.logger.error(f"Error creating database tables: {e}")
             raise
@@ -42,15 +79,19 @@ def create_app(database_url=None):
         try:
             Platform.insert_default_platforms()
             Category.insert_default_categories()
+            DataVersion.insert_default_versions()
             app.logger.info("Default platforms and categories initialized successfully")
         except Exception as e:
             app.logger.error(f"Error initializing default data: {str(e)}")
 
-    # Register blueprints
+    # Register blueprints (all /api/v1 routes live in the api blueprint)
+    from app.api import bp as api_bp
+    app.register_blueprint(api_bp)
+
     from app.routes import bp as main_bp
     app.register_blueprint(main_bp)
 
-    from app.api import bp as api_bp
-    app.register_blueprint(api_bp)
+    from app.http_cache import init_http_cache
+    init_http_cache(app)
 
     return app
\ No newline at end of file
@@ -1,113 +1,194 @@
-from flask import jsonify, request, abort
+import logging
+import time
+from flask import Response, current_app, jsonify, redirect, request, send_file, stream_with_context
+from werkzeug.exceptions import HTTPException
 from app.api import bp
-from app.models.models import Product, Platform, Category
+from app.db_routing import read_replica
+from app.http_cache import IMMUTABLE_MAX_AGE, versioned
+from app.images import image_cache, source_version, thumbnail_width
+from app.api.serializers import (CHANGE_COLUMNS, filter_products, page_args, parse_int, product_list_query,
+                                 product_detail_query, serialize_change, serialize_product, serialize_product_detail)
+from app.models.interest import view_counter
+from app.models.models import Product, PriceChange
+from app.models.reference import reference_data
 from app import db
 from datetime import datetime, timedelta
 from sqlalchemy import func, case
-from sqlalchemy.orm import joinedload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 1000
+
+
+@bp.errorhandler(HTTPException)
+def handle_http_error(e):
+    """Return API errors as JSON instead of HTML pages"""
+    return jsonify({'error': e.description}), e.code
+
+
+@bp.errorhandler(Exception)
+def handle_error(e):
+    logger.error(f"Error handling {request.path}: {str(e)}")
+    db.session.rollback()
+    return jsonify({'error': 'Internal server error'}), 500
+
 
 @bp.route('/products')
+@read_replica
+@versioned
 def get_products():
     """Get paginated list of products"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 12, type=int)
-    query = Product.query.order_by(Product.updated_at.desc())
-    
-    # Apply filters
-    search = request.args.get('search')
-    if search:
-        query = query.filter(Product.name.ilike(f'%{search}%'))
-        
-    category_id = request.args.get('category_id')
-    if category_id:
-        query = query.filter_by(category_id=category_id)
-        
-    platform_id = request.args.get('platform_id')
-    if platform_id:
-        query = query.filter_by(platform_id=platform_id)
-    
-    pagination = query.paginate(page=page, per_page=per_page)
-    
+    page, per_page = page_args(request.args)
+    query = filter_products(product_list_query(), request.args).order_by(Product.updated_at.desc())
+
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+
     return jsonify({
-        'items': [{
-            'id': p.id,
-            'name': p.name,
-            'url': p.url,
-            'image_url': p.image_url,
-            'platform': p.platform.name,
-            'current_price': p.current_price,
-            'currency': p.currency,
-            'last_update': p.last_price_update.isoformat() if p.last_price_update else None
-        } for p in pagination.items],
+        'items': [serialize_product(row) for row in pagination.items],
         'page': pagination.page,
         'total_pages': pagination.pages,
         'has_next': pagination.has_next
     })
 
 @bp.route('/products/<int:id>')
+@read_replica
+@versioned
 def get_product(id):
     """Get product details by ID"""
-    product = Product.query.options(joinedload(Product.platform)).get(id)
-    
+    product = product_detail_query().filter(Product.id == id).first()
+
     if not product:
-        abort(404, description="Product not found")
+        return jsonify({'error': 'Product not found'}), 404
 
-    return jsonify({
-        'id': product.id,
-        'name': product.name,
-        'url': product.url,
-        'image_url': product.image_url,
-        'platform': product.platform.name,
-        'current_price': product.current_price,
-        'currency': product.currency,
-        'price_history': product.price_history or [],
-        'last_update': product.last_price_update.isoformat() if product.last_price_update else None
-    })
+    # Product views raise the refresh priority of the product's category
+    view_counter.record(product.platform_id, product.category_id)
+    return jsonify(serialize_product_detail(product))
+
+@bp.route('/images/<int:id>')
+def get_product_image(id):
+    """Serve a resized, cached copy of a product's image"""
+    product = db.session.query(Product.image_url).filter(Product.id == id).first()
+    if not product or not product.image_url:
+        return jsonify({'error': 'Image not found'}), 404
+
+    cache = image_cache()
+    if not cache.allowed(product.image_url):
+        return jsonify({'error': 'Image host not allowed'}), 404
+    width = thumbnail_width(request.args.get('w', type=int))
+    path = cache.lookup(product.image_url, width)
+    if not path:
+        if cache.failed(product.image_url, width):
+            return jsonify({'error': 'Image not available'}), 404
+        # Cache it in the background and send the client to the original meanwhile
+        cache.warm(product.image_url, width)
+        response = redirect(product.image_url)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    # URLs carrying the current source hash never change content
+    immutable = request.args.get('v') == source_version(product.image_url)
+    response = send_file(path, mimetype=cache.mimetype(path), conditional=True,
+                         max_age=IMMUTABLE_MAX_AGE if immutable else 3600)
+    response.cache_control.public = True
+    response.cache_control.immutable = immutable or None
+    return response
 
 @bp.route('/categories')
+@versioned
 def get_categories():
     """Get all categories"""
-    categories = Category.query.all()
-    return jsonify([{
-        'id': c.id,
-        'name': c.name
-    } for c in categories])
+    return jsonify(reference_data.categories())
 
 @bp.route('/platforms')
+@versioned
 def get_platforms():
     """Get all platforms"""
-    platforms = Platform.query.all()
-    return jsonify([{
-        'id': p.id,
-        'name': p.name
-    } for p in platforms])
+    return jsonify(reference_data.platforms())
 
 @bp.route('/stats')
+@read_replica
 def get_stats():
     """Get platform stats and price changes"""
     # Get platform-specific stats
     platform_stats = db.session.query(
-        Platform.name,
+        Product.platform_id,
         func.count(Product.id).label('total_products'),
         func.count(Product.price_history).label('total_prices')
-    ).join(Product).group_by(Platform.name).all()
-    
-    # Calculate price changes in the last 24 hours
+    ).group_by(Product.platform_id).all()
+
+    # Count price changes in the last 24 hours from the change log
     yesterday = datetime.utcnow() - timedelta(days=1)
     price_changes = db.session.query(
-        func.sum(case((Product.current_price < Product.price_history[-1]['price'], 1), else_=0)).label('drops'),
-        func.sum(case((Product.current_price > Product.price_history[-1]['price'], 1), else_=0)).label('increases')
-    ).filter(Product.last_price_update >= yesterday).first()
+        func.sum(case((PriceChange.new_price < PriceChange.old_price, 1), else_=0)).label('drops'),
+        func.sum(case((PriceChange.new_price > PriceChange.old_price, 1), else_=0)).label('increases')
+    ).filter(PriceChange.kind == 'price', PriceChange.changed_at >= yesterday).first()
 
     stats = {
-        'total_products': Product.query.count(),
-        'price_drops': price_changes.drops if price_changes.drops else 0,
-        'price_increases': price_changes.increases if price_changes.increases else 0
+        'total_products': sum(platform.total_products for platform in platform_stats),
+        'price_drops': price_changes.drops if price_changes and price_changes.drops else 0,
+        'price_increases': price_changes.increases if price_changes and price_changes.increases else 0
     }
 
-    # Add platform-specific stats
-    for platform in platform_stats:
-        stats[f'{platform.name.lower()}_products'] = platform.total_products
-        stats[f'{platform.name.lower()}_prices'] = platform.total_prices
+    # Add platform-specific stats (platforms without products report zeros)
+    counts = {platform.platform_id: platform for platform in platform_stats}
+    for platform in reference_data.platforms():
+        row = counts.get(platform['id'])
+        stats[f"{platform['name'].lower()}_products"] = row.total_products if row else 0
+        stats[f"{platform['name'].lower()}_prices"] = row.total_prices if row else 0
+
+    return jsonify(stats)
+
+def changes_after(cursor, limit):
+    """Change log rows after `cursor`, oldest first (ids are committed in order)."""
+    return db.session.query(*CHANGE_COLUMNS).filter(
+        PriceChange.id > cursor
+    ).order_by(PriceChange.id).limit(limit).all()
+
+
+def change_cursor(value):
+    """Parse a `since` cursor; 'latest' starts after the newest change."""
+    if value == 'latest':
+        return db.session.query(func.max(PriceChange.id)).scalar() or 0
+    return max(parse_int(value, 0), 0)
+
+@bp.route('/changes')
+@read_replica
+def get_changes():
+    """Get new products and price changes after a cursor, for incremental sync"""
+    cursor = change_cursor(request.args.get('since'))
+    limit = min(max(parse_int(request.args.get('limit'), DEFAULT_CHANGES_LIMIT), 1), MAX_CHANGES_LIMIT)
+    rows = changes_after(cursor, limit)
+
+    return jsonify({
+        'items': [serialize_change(row) for row in rows],
+        'cursor': rows[-1].id if rows else cursor,
+        'has_more': len(rows) == limit
+    })
+
+@bp.route('/changes/stream')
+@read_replica
+def stream_changes():
+    """Server-Sent Events stream of the change log; resumes from Last-Event-ID or `since`"""
+    cursor = change_cursor(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    poll = current_app.config['CHANGE_STREAM_POLL_SECONDS']
+    # Streams end after a while so they do not pin a worker forever; EventSource reconnects
+    deadline = time.monotonic() + current_app.config['CHANGE_STREAM_TIMEOUT']
+
+    @stream_with_context
+    def events():
+        nonlocal cursor
+        yield f"retry: {int(poll * 1000)}\n\n"
+        while time.monotonic() < deadline:
+            rows = changes_after(cursor, MAX_CHANGES_LIMIT)
+            # End the read transaction so the connection goes back to the pool while idle
+            db.session.rollback()
+            for row in rows:
+                cursor = row.id
+                yield f"id: {row.id}\nevent: change\ndata: {current_app.json.dumps(serialize_change(row))}\n\n"
+            if len(rows) < MAX_CHANGES_LIMIT:
+                yield ": keep-alive\n\n"
+                time.sleep(poll)
 
-    return jsonify(stats)
\ No newline at end of file
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -0,0 +1,128 @@
+from sqlalchemy import select
+
+from app import db
+from app.images import thumbnail_url
+from app.models.history import normalize_history
+from app.models.models import Product, Platform, PriceChange
+
+# Columns needed by the product listing; selected directly instead of hydrating ORM objects
+PRODUCT_LIST_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.url,
+    Product.image_url,
+    Product.current_price,
+    Product.currency,
+    Product.last_price_update,
+    Platform.name.label('platform')
+)
+
+PRODUCT_DETAIL_COLUMNS = PRODUCT_LIST_COLUMNS + (Product.price_history, Product.platform_id, Product.category_id)
+
+CHANGE_COLUMNS = (
+    PriceChange.id,
+    PriceChange.product_id,
+    PriceChange.platform_id,
+    PriceChange.category_id,
+    PriceChange.kind,
+    PriceChange.old_price,
+    PriceChange.new_price,
+    PriceChange.changed_at
+)
+
+DEFAULT_PER_PAGE = 12
+MAX_PER_PAGE = 100
+
+
+def parse_int(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def page_args(args):
+    """(page, per_page) from query string args, clamped to sane bounds."""
+    page = max(parse_int(args.get('page'), 1), 1)
+    per_page = min(max(parse_int(args.get('per_page'), DEFAULT_PER_PAGE), 1), MAX_PER_PAGE)
+    return page, per_page
+
+
+def filter_id(args, name):
+    """Get an integer filter from the query string; empty and 'all' mean no filter."""
+    value = args.get(name)
+    if not value or value == 'all':
+        return None
+    return parse_int(value)
+
+
+def filter_products(query, args):
+    """Apply the search, category_id and platform_id filters to a product query or select()."""
+    search = args.get('search')
+    if search:
+        query = query.filter(Product.name.ilike(f'%{search}%'))
+
+    category_id = filter_id(args, 'category_id')
+    if category_id:
+        query = query.filter(Product.category_id == category_id)
+
+    platform_id = filter_id(args, 'platform_id')
+    if platform_id:
+        query = query.filter(Product.platform_id == platform_id)
+    return query
+
+
+def product_list_query():
+    """Query selecting only the listing columns, joined to the platform name."""
+    return db.session.query(*PRODUCT_LIST_COLUMNS).join(Platform, Product.platform_id == Platform.id)
+
+
+def product_detail_query():
+    """Query selecting the listing columns plus the price history."""
+    return db.session.query(*PRODUCT_DETAIL_COLUMNS).join(Platform, Product.platform_id == Platform.id)
+
+
+def product_list_select():
+    """Core select() of the listing columns, for use outside the Flask session (async engine)."""
+    return select(*PRODUCT_LIST_COLUMNS).join(Platform, Product.platform_id == Platform.id)
+
+
+def product_detail_select():
+    """Core select() of the detail columns, for use outside the Flask session (async engine)."""
+    return select(*PRODUCT_DETAIL_COLUMNS).join(Platform, Product.platform_id == Platform.id)
+
+
+def serialize_product(row):
+    """Serialize a product listing row"""
+    return {
+        'id': row.id,
+        'name': row.name,
+        'url': row.url,
+        'image_url': row.image_url,
+        'thumbnail_url': thumbnail_url(row.id, row.image_url),
+        'platform': row.platform,
+        'current_price': row.current_price,
+        'currency': row.currency,
+        'last_update': row.last_price_update.isoformat() if row.last_price_update else None
+    }
+
+
+def serialize_product_detail(row):
+    """Serialize a product detail row, including its price history"""
+    data = serialize_product(row)
+    data['price_history'] = normalize_history(row.price_history)
+    return data
+
+
+def serialize_change(row):
+    """Serialize a change log row"""
+    return {
+        'id': row.id,
+        'product_id': row.product_id,
+        'platform_id': row.platform_id,
+        'category_id': row.category_id,
+        'kind': row.kind,
+        'old_price': row.old_price,
+        'new_price': row.new_price,
+        'changed_at': row.changed_at.isoformat()
+    }
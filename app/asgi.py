@@ -0,0 +1,181 @@
+"""ASGI entry point serving the read API on an async database driver.
+
+The hot read endpoints (product listing, product detail, categories and
+platforms) are Starlette handlers on SQLAlchemy's asyncio engine, so a slow
+query waits on the event loop instead of holding a whole worker. Every other
+path (pages, static files, stats) falls through to the Flask app. Like
+wsgi.py, this imports no scraper code.
+
+Run with:
+    gunicorn app.asgi:app -k uvicorn_worker.UvicornWorker
+
+Needs the packages in requirements-asgi.txt: starlette, uvicorn, a2wsgi and
+an async driver (asyncpg for PostgreSQL, aiosqlite for SQLite). The async
+URL is derived from the Flask database URL unless ASYNC_DATABASE_URL is set.
+With a read replica configured, product queries go to it while it is up to
+date, as in app/db_routing.py.
+"""
+import contextlib
+import logging
+import os
+from math import ceil
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_accept_header
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:  # older Starlette releases ship their own (deprecated) WSGI adapter
+    from starlette.middleware.wsgi import WSGIMiddleware
+
+from app import create_app, db
+from app.api.serializers import (filter_products, page_args, product_list_select, product_detail_select,
+                                 serialize_product, serialize_product_detail)
+from app.db_routing import REPLICA, replica_configured, replica_ready
+from app.http_cache import choose_encoding, compress
+from app.json_provider import orjson
+from app.models.interest import view_counter
+from app.models.models import Product
+from app.models.reference import reference_data
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite'
+}
+
+
+class APIResponse(JSONResponse):
+    """JSON response matching the Flask API: orjson when available, open CORS."""
+
+    def __init__(self, content, status_code=200, **kwargs):
+        super().__init__(content, status_code=status_code, **kwargs)
+        self.headers.setdefault('Access-Control-Allow-Origin', '*')
+
+    def render(self, content):
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def async_database_url(flask_app, bind_key=None):
+    """A Flask database URL (the primary's, or a bind's) with its async driver.
+
+    ASYNC_DATABASE_URL overrides the primary's URL.
+    """
+    url = os.getenv('ASYNC_DATABASE_URL') if bind_key is None else None
+    if url:
+        return url
+    with flask_app.app_context():
+        # Resolved by Flask-SQLAlchemy, so relative SQLite paths point at the instance folder
+        url = db.engines[bind_key].url
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def create_asgi_app(flask_app=None):
+    flask_app = flask_app or create_app()
+    engine = create_async_engine(async_database_url(flask_app))
+    replica_engine = create_async_engine(async_database_url(flask_app, REPLICA)) if replica_configured(flask_app) else None
+
+    min_size = flask_app.config['COMPRESS_MIN_SIZE']
+
+    def in_app_context(func, *args):
+        with flask_app.app_context():
+            return func(*args)
+
+    async def read_engine(request):
+        """The replica's engine when it has caught up with the primary, else the primary's."""
+        if replica_engine is None:
+            return engine
+        min_version = request.headers.get('x-data-version', '0')
+        ready = await run_in_threadpool(in_app_context, replica_ready, int(min_version) if min_version.isdigit() else 0)
+        return replica_engine if ready else engine
+
+    def respond(request, content):
+        """APIResponse compressed the way the Flask app compresses its responses."""
+        response = APIResponse(content)
+        response.headers['Vary'] = 'Accept-Encoding'
+        encoding = choose_encoding(parse_accept_header(request.headers.get('accept-encoding')))
+        if encoding and len(response.body) >= min_size:
+            response.body = compress(response.body, encoding)
+            response.headers['Content-Encoding'] = encoding
+            response.headers['Content-Length'] = str(len(response.body))
+        return response
+
+    async def get_products(request):
+        """Get paginated list of products"""
+        page, per_page = page_args(request.query_params)
+        query = filter_products(product_list_select(), request.query_params)
+        async with (await read_engine(request)).connect() as conn:
+            total = await conn.scalar(select(func.count()).select_from(query.subquery()))
+            result = await conn.execute(
+                query.order_by(Product.updated_at.desc()).limit(per_page).offset((page - 1) * per_page))
+            rows = result.all()
+
+        total_pages = ceil(total / per_page) if total else 0
+        return respond(request, {
+            'items': [serialize_product(row) for row in rows],
+            'page': page,
+            'total_pages': total_pages,
+            'has_next': page < total_pages
+        })
+
+    async def get_product(request):
+        """Get product details by ID"""
+        async with (await read_engine(request)).connect() as conn:
+            result = await conn.execute(product_detail_select().where(Product.id == request.path_params['id']))
+            product = result.first()
+
+        if not product:
+            return APIResponse({'error': 'Product not found'}, status_code=404)
+
+        # Buffered in memory; only every Nth view writes to the database
+        await run_in_threadpool(in_app_context, view_counter.record, product.platform_id, product.category_id)
+        return respond(request, serialize_product_detail(product))
+
+    async def get_categories(request):
+        """Get all categories"""
+        return respond(request, await run_in_threadpool(in_app_context, reference_data.categories))
+
+    async def get_platforms(request):
+        """Get all platforms"""
+        return respond(request, await run_in_threadpool(in_app_context, reference_data.platforms))
+
+    async def handle_http_error(request, exc):
+        return APIResponse({'error': exc.detail}, status_code=exc.status_code)
+
+    async def handle_error(request, exc):
+        logger.error(f"Error handling {request.url.path}: {str(exc)}")
+        return APIResponse({'error': 'Internal server error'}, status_code=500)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        await engine.dispose()
+        if replica_engine is not None:
+            await replica_engine.dispose()
+
+    return Starlette(
+        routes=[
+            Route('/api/v1/products', get_products),
+            Route('/api/v1/products/{id:int}', get_product),
+            Route('/api/v1/categories', get_categories),
+            Route('/api/v1/platforms', get_platforms),
+            Mount('/', app=WSGIMiddleware(flask_app))
+        ],
+        exception_handlers={HTTPException: handle_http_error, Exception: handle_error},
+        lifespan=lifespan
+    )
+
+
+app = create_asgi_app()
@@ -0,0 +1,88 @@
+"""Read-replica routing for read-only API views.
+
+With DATABASE_REPLICA_URL set, create_app registers the replica as the
+'replica' bind. Views decorated with @read_replica run their SELECTs on it,
+while ingest, the scheduler and any write statement keep using the primary.
+
+Replicas lag behind ingest, which bumps the catalog data version with every
+batch, so the replica is used while it is at most REPLICA_MAX_LAG_SECONDS
+behind: its newest catalog version (replicated with its updated_at) is that
+recent, or it has the primary's current version. Responses carry the
+version they were served at in X-Data-Version; clients sending it back
+(e.g. after triggering an update) are only served from a replica that has
+reached it. Replica state is cached per process for DATA_VERSION_TTL, so
+routing costs no query on most requests.
+"""
+import functools
+import logging
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, g, has_app_context, make_response, request
+from flask_sqlalchemy.session import Session
+
+logger = logging.getLogger(__name__)
+
+REPLICA = 'replica'
+RETRY_SECONDS = 10  # after the replica fails, use the primary this long before trying again
+
+_unavailable_until = 0
+
+
+class RoutingSession(Session):
+    """Session sending SELECTs to the read replica while a @read_replica view has chosen it."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and has_app_context() and g.get('db_bind') == REPLICA
+                and getattr(clause, 'is_select', False) and not self._flushing):
+            return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_configured(app):
+    return REPLICA in app.config.get('SQLALCHEMY_BINDS', {})
+
+
+def replica_ready(min_version=0):
+    """Whether reads may go to the replica.
+
+    With a `min_version` the replica must have reached it; otherwise it must be
+    at most REPLICA_MAX_LAG_SECONDS behind or have the primary's current version.
+    """
+    global _unavailable_until
+    from app import db
+    from app.models.versions import data_versions
+
+    if time.monotonic() < _unavailable_until:
+        return False
+    try:
+        replica_version, replica_updated_at = data_versions.state(bind_key=REPLICA)
+    except Exception as e:
+        logger.warning(f"Read replica unavailable, using the primary for {RETRY_SECONDS}s: {str(e)}")
+        db.session.rollback()
+        _unavailable_until = time.monotonic() + RETRY_SECONDS
+        return False
+
+    if min_version:
+        return replica_version >= min_version
+    max_lag = timedelta(seconds=current_app.config['REPLICA_MAX_LAG_SECONDS'])
+    if replica_updated_at and replica_updated_at >= datetime.utcnow() - max_lag:
+        # Anything the replica is missing was committed after replica_updated_at
+        return True
+    return replica_version >= data_versions.get()
+
+
+def read_replica(view):
+    """Run a read-only view on the replica when one is configured and recent enough."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from app.models.versions import data_versions
+
+        min_version = request.headers.get('X-Data-Version', 0, type=int)
+        if replica_configured(current_app) and replica_ready(min_version):
+            g.db_bind = REPLICA
+        response = make_response(view(*args, **kwargs))
+        version = data_versions.get(bind_key=g.get('db_bind'))
+        response.headers['X-Data-Version'] = str(max(version, min_version))
+        return response
+    return wrapper
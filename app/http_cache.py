@@ -0,0 +1,199 @@
+"""Response compression, data-version ETags and content-hashed static URLs.
+
+- Compressible responses of at least COMPRESS_MIN_SIZE bytes are sent with
+  brotli (when the brotli package is installed) or gzip, whichever the
+  client accepts. Compressed static files are cached in memory.
+- Views decorated with @versioned get a strong ETag built from the catalog
+  data version and the request URL, and answer If-None-Match with a 304
+  without running the view. Compressed variants get a -br/-gz suffix.
+- url_for('static', ...) adds a ?v=<content hash> parameter; requests that
+  carry the current hash are cached by browsers for a year as immutable,
+  others for STATIC_MAX_AGE seconds.
+"""
+import functools
+import gzip
+import hashlib
+import os
+import threading
+
+from flask import current_app, g, make_response, request
+from werkzeug.utils import safe_join
+
+from app.models.versions import data_versions
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is used without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'text/css',
+    'text/html',
+    'text/plain',
+    'image/svg+xml'
+}
+ENCODING_SUFFIXES = {'br': 'br', 'gzip': 'gz'}
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+STATIC_CACHE_ENTRIES = 256
+
+_static_hashes = {}
+_compressed_static = {}
+_lock = threading.Lock()
+
+
+def choose_encoding(accept_encodings):
+    """Best supported content coding from a parsed Accept-Encoding header, or None."""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, static=False):
+    if encoding == 'br':
+        # Static files are compressed once, so they get the slow maximum quality
+        return brotli.compress(data, quality=11 if static else 5)
+    return gzip.compress(data, compresslevel=9 if static else 6)
+
+
+def compress_static(path, etag, data, encoding):
+    """Compress a static file body once per file version and encoding."""
+    key = (path, etag, encoding)
+    compressed = _compressed_static.get(key)
+    if compressed is None:
+        compressed = compress(data, encoding, static=True)
+        with _lock:
+            if len(_compressed_static) >= STATIC_CACHE_ENTRIES:
+                _compressed_static.clear()
+            _compressed_static[key] = compressed
+    return compressed
+
+
+def compress_response(response):
+    """after_request hook compressing responses the client can decode."""
+    if response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    if response.content_length is not None and response.content_length < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    static = response.direct_passthrough
+    if static:
+        # send_file streams the file; read it so it can be compressed
+        response.direct_passthrough = False
+    elif response.is_streamed:
+        return response
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    etag, weak = response.get_etag()
+    if static:
+        response.set_data(compress_static(request.path, etag, data, encoding))
+        if etag:
+            # Weak, so the file's single ETag validates every encoding (as nginx does)
+            response.set_etag(etag, weak=True)
+    else:
+        response.set_data(compress(data, encoding))
+        if etag:
+            response.set_etag(f"{etag}-{ENCODING_SUFFIXES[encoding]}", weak)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def version_etag():
+    """ETag of the current request's URL at the catalog data version of the database serving it.
+
+    Views also decorated with @read_replica must have it outside @versioned,
+    so the bind is chosen before the tag is built from its version.
+    """
+    digest = hashlib.blake2b(request.full_path.encode('utf-8'), digest_size=8).hexdigest()
+    return f"v{data_versions.get(bind_key=g.get('db_bind'))}-{digest}"
+
+
+def versioned(view):
+    """Give a GET view a strong ETag from the data version and answer matching requests with 304."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = version_etag()
+        variants = [etag] + [f"{etag}-{suffix}" for suffix in ENCODING_SUFFIXES.values()]
+        matched = next((variant for variant in variants if variant in request.if_none_match), None)
+        if matched:
+            response = current_app.response_class(status=304)
+            response.set_etag(matched)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+        # Cacheable, but revalidated on every use
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return wrapper
+
+
+def static_file_hash(folder, filename):
+    """Short content hash of a static file, cached until its mtime changes."""
+    path = safe_join(folder, filename) if folder else None
+    if not path or not os.path.isfile(path):
+        return None
+    mtime = os.stat(path).st_mtime
+    cached = _static_hashes.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    with _lock:
+        _static_hashes[path] = (mtime, digest)
+    return digest
+
+
+def static_folder(endpoint):
+    if endpoint == 'static':
+        return current_app.static_folder
+    blueprint = current_app.blueprints.get(endpoint.rsplit('.', 1)[0])
+    return blueprint.static_folder if blueprint else None
+
+
+def is_static_endpoint(endpoint):
+    return endpoint is not None and (endpoint == 'static' or endpoint.endswith('.static'))
+
+
+def add_static_hash(endpoint, values):
+    """url_defaults hook adding ?v=<content hash> to static file URLs."""
+    if is_static_endpoint(endpoint) and 'filename' in values and 'v' not in values:
+        digest = static_file_hash(static_folder(endpoint), values['filename'])
+        if digest:
+            values['v'] = digest
+
+
+def cache_static(response):
+    """after_request hook setting browser cache lifetimes for static files."""
+    if not is_static_endpoint(request.endpoint) or response.status_code not in (200, 304):
+        return response
+    filename = request.view_args.get('filename') if request.view_args else None
+    version = request.args.get('v')
+    response.cache_control.no_cache = None
+    if version and version == static_file_hash(static_folder(request.endpoint), filename):
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['STATIC_MAX_AGE']
+    return response
+
+
+def init_http_cache(app):
+    app.url_defaults(add_static_hash)
+    # Registered first so it runs last, after cache headers are set
+    app.after_request(compress_response)
+    app.after_request(cache_static)
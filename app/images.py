@@ -0,0 +1,255 @@
+"""Product image proxy with a resized thumbnail disk cache.
+
+Product images are fetched from the retailer once, shrunk to one of
+THUMBNAIL_WIDTHS and stored as WebP under IMAGE_CACHE_DIR, then served
+from there with long cache lifetimes, so pages stop hot-linking full-size
+images from retailer CDNs. Without Pillow the original bytes are cached
+as they are. The cache is trimmed to IMAGE_CACHE_MAX_MB by deleting the
+least recently used files.
+
+Only http(s) URLs on a host listed in a site's image_hosts (or in
+IMAGE_PROXY_HOSTS) are fetched, and redirects are only followed to such
+hosts. Requests never wait on the retailer: a cache miss is fetched and
+resized by a background thread while the client is redirected to the
+original image.
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from flask import current_app
+
+from app.scrapers.registry import all_sites
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; images are cached unresized without it
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTHS = (120, 240, 480)
+DEFAULT_WIDTH = 240
+MAX_SOURCE_BYTES = 5 * 1024 * 1024
+FAILURE_TTL = 600  # seconds before a failed image is fetched again
+MAX_REDIRECTS = 3
+MAX_QUEUED = 200  # images waiting to be cached; further misses are retried on a later request
+WEBP_QUALITY = 80
+USER_AGENT = 'Mozilla/5.0 (compatible; PriceTrac image cache)'
+
+# Magic numbers of the formats retailers serve, for caches written without Pillow
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG', 'image/png'),
+    (b'GIF8', 'image/gif'),
+    (b'RIFF', 'image/webp')
+)
+
+
+def thumbnail_width(requested):
+    """Snap a requested width to the smallest supported one that covers it."""
+    if not requested:
+        return DEFAULT_WIDTH
+    return next((width for width in THUMBNAIL_WIDTHS if width >= requested), THUMBNAIL_WIDTHS[-1])
+
+
+def source_version(image_url):
+    """Short hash of a source URL; thumbnail URLs carrying it can be cached as immutable."""
+    return hashlib.blake2b(image_url.encode('utf-8'), digest_size=6).hexdigest()
+
+
+def thumbnail_url(product_id, image_url, width=DEFAULT_WIDTH):
+    """Proxy URL of a product image, or None for products without one."""
+    if not image_url:
+        return None
+    return f"/api/v1/images/{product_id}?w={width}&v={source_version(image_url)}"
+
+
+class ImageCache:
+    """Thumbnails on local disk, keyed by source URL and width, with LRU eviction by atime.
+
+    Access times are set explicitly on every hit (so noatime mounts don't
+    matter) and modification times are left alone, keeping the ETag and
+    Last-Modified headers send_file derives from them stable.
+    """
+
+    def __init__(self, root, max_bytes, allowed_hosts=(), timeout=10, threads=2):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.allowed_hosts = tuple(host.lower() for host in allowed_hosts)
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        self._lock = threading.Lock()
+        self._size = None
+        self._failures = {}
+        self._queued = set()
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='image-cache')
+
+    @classmethod
+    def from_config(cls, config):
+        hosts = [host for site in all_sites() for host in site.image_hosts] + list(config['IMAGE_PROXY_HOSTS'])
+        return cls(config['IMAGE_CACHE_DIR'], config['IMAGE_CACHE_MAX_MB'] * 1024 * 1024, hosts,
+                   threads=config['IMAGE_CACHE_THREADS'])
+
+    def allowed(self, image_url):
+        parts = urlsplit(image_url)
+        host = (parts.hostname or '').lower()
+        if parts.scheme not in ('http', 'https') or not host:
+            return False
+        return any(host == allowed or host.endswith('.' + allowed) for allowed in self.allowed_hosts)
+
+    def path(self, image_url, width):
+        digest = hashlib.sha256(f"{width}:{image_url}".encode('utf-8')).hexdigest()
+        return os.path.join(self.root, digest[:2], f"{digest}.{'webp' if Image else 'img'}")
+
+    @staticmethod
+    def mimetype(path):
+        if path.endswith('.webp'):
+            return 'image/webp'
+        with open(path, 'rb') as f:
+            head = f.read(8)
+        return next((mimetype for signature, mimetype in SIGNATURES if head.startswith(signature)),
+                    'application/octet-stream')
+
+    def lookup(self, image_url, width):
+        """Path of the cached thumbnail, or None on a miss."""
+        path = self.path(image_url, width)
+        try:
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))  # mark as recently used
+            return path
+        except FileNotFoundError:
+            return None
+
+    def failed(self, image_url, width):
+        """Whether the image failed to load recently."""
+        return self._failures.get(self.path(image_url, width), 0) > time.monotonic()
+
+    def warm(self, image_url, width):
+        """Fetch and cache a thumbnail in the background; returns False if the queue is full."""
+        key = (image_url, width)
+        with self._lock:
+            if key in self._queued:
+                return True
+            if len(self._queued) >= MAX_QUEUED:
+                return False
+            self._queued.add(key)
+        self._executor.submit(self.load, image_url, width)
+        return True
+
+    def load(self, image_url, width):
+        """Fetch, resize and store a thumbnail; returns its path, or None if the image is unavailable."""
+        path = self.path(image_url, width)
+        try:
+            self.store(path, self.resize(self.fetch(image_url), width))
+            return path
+        except Exception as e:
+            logger.warning(f"Error caching image {image_url}: {str(e)}")
+            with self._lock:
+                if len(self._failures) > 10000:
+                    self._failures.clear()
+                self._failures[path] = time.monotonic() + FAILURE_TTL
+            return None
+        finally:
+            with self._lock:
+                self._queued.discard((image_url, width))
+
+    def fetch(self, image_url):
+        """Download an image, following redirects only to allowed hosts."""
+        url = image_url
+        for _ in range(MAX_REDIRECTS + 1):
+            with self.session.get(url, timeout=self.timeout, stream=True, allow_redirects=False) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers['Location'])
+                    if not self.allowed(url):
+                        raise ValueError(f"redirected to a host that is not allowed: {url}")
+                    continue
+                response.raise_for_status()
+                chunks, size = [], 0
+                for chunk in response.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size > MAX_SOURCE_BYTES:
+                        raise ValueError(f"image larger than {MAX_SOURCE_BYTES} bytes")
+                    chunks.append(chunk)
+            return b''.join(chunks)
+        raise ValueError(f"more than {MAX_REDIRECTS} redirects")
+
+    @staticmethod
+    def resize(data, width):
+        """Shrink to `width` pixels wide (never enlarging) and encode as WebP."""
+        if Image is None:
+            return data
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail((width, width * 4))
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if image.mode in ('P', 'LA') or 'transparency' in image.info else 'RGB')
+            output = io.BytesIO()
+            image.save(output, 'WEBP', quality=WEBP_QUALITY, method=4)
+        return output.getvalue()
+
+    def store(self, path, body):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self.entries())
+            else:
+                self._size += len(body)
+            over = self._size > self.max_bytes
+        if over:
+            self.evict(keep=path)
+
+    def entries(self):
+        """(last used, size, path) of every cached file."""
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith('.tmp'):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_atime, stat.st_size, path
+
+    def evict(self, keep=None):
+        """Delete least recently used files, except `keep`, until the cache is at 90% of its limit."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            self._size = total
+        logger.info(f"Evicted {removed} cached images, {total / 1024 / 1024:.1f} MB left")
+
+
+def image_cache():
+    """The application's ImageCache, created on first use."""
+    cache = current_app.extensions.get('image_cache')
+    if cache is None:
+        cache = current_app.extensions['image_cache'] = ImageCache.from_config(current_app.config)
+    return cache
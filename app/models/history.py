@@ -0,0 +1,206 @@
+# app/models/history.py
+"""Price history storage formats and compaction.
+
+A product's price_history is a JSON list of entries, oldest first. Entries
+come in two formats, which may be mixed in one list:
+
+- verbose: {"price": 999.0, "timestamp": "2026-01-01T00:00:00"}
+- packed:  [1767225600, 999.0]  (epoch seconds, price)
+
+Compaction keeps raw points for recent data and rolls older points into
+daily, then weekly, aggregates carrying min/max/close prices. Aggregates
+keep "price" (the close) and "timestamp" (start of the period) so readers
+that only look at those keys keep working:
+
+- verbose: {"price": 999.0, "timestamp": "...", "min": 950.0, "max": 999.0, "period": "day"}
+- packed:  [1767225600, 999.0, 950.0, 999.0, "d"]
+
+Usage: python -m app.models.history  (compacts every product's history)
+"""
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+VERBOSE = 'verbose'
+PACKED = 'packed'
+PERIOD_CODES = {'day': 'd', 'week': 'w'}
+PERIOD_NAMES = {code: name for name, code in PERIOD_CODES.items()}
+
+DEFAULT_RAW_DAYS = 30
+DEFAULT_DAILY_DAYS = 365
+DEFAULT_WEEKLY_DAYS = 0  # 0 keeps weekly aggregates forever
+
+
+def history_settings(config=None):
+    """Read the storage format and retention tiers from the app config (or the environment)."""
+    if config is None:
+        try:
+            from flask import current_app
+            config = current_app.config
+        except RuntimeError:  # outside an application context
+            config = {}
+
+    def setting(name, default):
+        return config.get(name, os.getenv(name, default))
+
+    return {
+        'format': setting('PRICE_HISTORY_FORMAT', VERBOSE),
+        'raw_days': int(setting('PRICE_HISTORY_RAW_DAYS', DEFAULT_RAW_DAYS)),
+        'daily_days': int(setting('PRICE_HISTORY_DAILY_DAYS', DEFAULT_DAILY_DAYS)),
+        'weekly_days': int(setting('PRICE_HISTORY_WEEKLY_DAYS', DEFAULT_WEEKLY_DAYS))
+    }
+
+
+def to_epoch(timestamp):
+    return int(timestamp.replace(tzinfo=timezone.utc).timestamp())
+
+
+def from_epoch(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None)
+
+
+def make_entry(price, timestamp, fmt=VERBOSE):
+    """Build a raw history point in the given storage format."""
+    if fmt == PACKED:
+        return [to_epoch(timestamp), price]
+    return {'price': price, 'timestamp': timestamp.isoformat()}
+
+
+def parse_entry(entry):
+    """Decode an entry of either format into (timestamp, close, min, max, period or None)."""
+    if isinstance(entry, (list, tuple)):
+        timestamp = from_epoch(entry[0])
+        if len(entry) >= 5:
+            return timestamp, entry[1], entry[2], entry[3], PERIOD_NAMES.get(entry[4], entry[4])
+        return timestamp, entry[1], entry[1], entry[1], None
+
+    timestamp = datetime.fromisoformat(entry['timestamp'])
+    price = entry['price']
+    return timestamp, price, entry.get('min', price), entry.get('max', price), entry.get('period')
+
+
+def encode_entry(timestamp, close, low, high, period, fmt=VERBOSE):
+    """Encode a decoded entry back into the given storage format."""
+    if period is None:
+        return make_entry(close, timestamp, fmt)
+    if fmt == PACKED:
+        return [to_epoch(timestamp), close, low, high, PERIOD_CODES[period]]
+    return {'price': close, 'timestamp': timestamp.isoformat(), 'min': low, 'max': high, 'period': period}
+
+
+def normalize_entry(entry):
+    """Convert an entry of either format to the verbose dict served to API clients."""
+    return encode_entry(*parse_entry(entry), fmt=VERBOSE)
+
+
+def normalize_history(history):
+    return [normalize_entry(entry) for entry in history or []]
+
+
+def last_price(history):
+    """Price of the most recent history entry, or None for an empty history."""
+    if not history:
+        return None
+    return parse_entry(history[-1])[1]
+
+
+def period_start(timestamp, period):
+    day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def compact_history(history, now=None, raw_days=DEFAULT_RAW_DAYS, daily_days=DEFAULT_DAILY_DAYS,
+                    weekly_days=DEFAULT_WEEKLY_DAYS, fmt=VERBOSE):
+    """Roll a price history into retention tiers.
+
+    Points newer than raw_days stay as they are, points up to daily_days old
+    become one aggregate per day, older points one aggregate per ISO week,
+    and with weekly_days > 0 anything older than that is dropped. Entries are
+    re-encoded in `fmt`. Compacting an already compacted history is a no-op.
+    """
+    now = now or datetime.utcnow()
+    raw_cutoff = now - timedelta(days=raw_days)
+    daily_cutoff = now - timedelta(days=max(daily_days, raw_days))
+    drop_cutoff = now - timedelta(days=weekly_days) if weekly_days else None
+
+    entries = sorted((parse_entry(entry) for entry in history or []), key=lambda e: e[0])
+    compacted = []
+    buckets = {}
+    for timestamp, close, low, high, period in entries:
+        if drop_cutoff and timestamp < drop_cutoff:
+            continue
+        if timestamp >= raw_cutoff:
+            compacted.append((timestamp, close, low, high, period))
+            continue
+
+        target = 'day' if timestamp >= daily_cutoff else 'week'
+        # A weekly bucket never gets rolled into a daily one
+        if period == 'week':
+            target = 'week'
+        key = (target, period_start(timestamp, target))
+        if key in buckets:
+            _, _, bucket_low, bucket_high, _ = buckets[key]
+            buckets[key] = (key[1], close, min(bucket_low, low), max(bucket_high, high), target)
+        else:
+            buckets[key] = (key[1], close, low, high, target)
+
+    compacted.extend(buckets.values())
+    compacted.sort(key=lambda e: e[0])
+    return [encode_entry(*entry, fmt=fmt) for entry in compacted]
+
+
+def compact_price_histories(batch_size=500, now=None, settings=None):
+    """Compact the price history of every product, committing in batches.
+
+    Must be called inside an application context. Returns the number of
+    products whose stored history changed.
+    """
+    from app import db
+    from app.models.models import Product
+    from app.models.versions import data_versions
+
+    settings = settings or history_settings()
+    changed = 0
+    last_id = 0
+    while True:
+        products = Product.query.filter(Product.id > last_id).order_by(Product.id).limit(batch_size).all()
+        if not products:
+            break
+        batch_changed = 0
+        for product in products:
+            compacted = compact_history(product.price_history, now=now,
+                                        raw_days=settings['raw_days'],
+                                        daily_days=settings['daily_days'],
+                                        weekly_days=settings['weekly_days'],
+                                        fmt=settings['format'])
+            if compacted != (product.price_history or []):
+                product.price_history = compacted
+                batch_changed += 1
+        if batch_changed:
+            data_versions.bump()
+        changed += batch_changed
+        last_id = products[-1].id
+        db.session.commit()
+        # Release the committed batch so memory stays bounded on large catalogs
+        db.session.expunge_all()
+
+    logger.info(f"Compacted price history of {changed} products")
+    return changed
+
+
+def run_compaction():
+    """Compact all price histories in a fresh application context."""
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        return compact_price_histories()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    run_compaction()
@@ -0,0 +1,61 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_EVERY = 100  # views
+DEFAULT_FLUSH_SECONDS = 60
+
+
+class ViewCounter:
+    """Buffers product detail views per platform/category and adds them to ScrapeJob.views.
+
+    Views are counted in memory and written in one UPDATE per category every
+    `flush_every` views or `flush_seconds`, so read requests do not each
+    turn into a write.
+    """
+
+    def __init__(self, flush_every=DEFAULT_FLUSH_EVERY, flush_seconds=DEFAULT_FLUSH_SECONDS):
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+
+    def record(self, platform_id, category_id):
+        """Count one view; flushes when the buffer is full or old. Needs an app context."""
+        with self._lock:
+            self._counts[(platform_id, category_id)] += 1
+            self._pending += 1
+            due = (self._pending >= self.flush_every
+                   or time.monotonic() - self._flushed_at >= self.flush_seconds)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered views to the scrape_jobs table."""
+        from app.models.models import ScrapeJob
+
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._pending = 0
+            self._flushed_at = time.monotonic()
+        if not counts:
+            return
+
+        try:
+            for (platform_id, category_id), views in counts.items():
+                ScrapeJob.query.filter_by(platform_id=platform_id, category_id=category_id).update(
+                    {ScrapeJob.views: ScrapeJob.views + views}, synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error flushing product views: {str(e)}")
+            db.session.rollback()
+
+
+view_counter = ViewCounter()
@@ -1,5 +1,8 @@
 from datetime import datetime
 from app import db
+from app.models.history import history_settings, make_entry, last_price
+from app.models.reference import reference_data
+from app.models.versions import CATALOG, data_versions
 
 class Platform(db.Model):
     __tablename__ = 'platforms'
@@ -10,15 +13,15 @@ class Platform(db.Model):
 
     @staticmethod
     def insert_default_platforms():
-        default_platforms = [
-            {'name': 'Jumia', 'url': 'https://www.jumia.co.ke'},
-            {'name': 'Kilimall', 'url': 'https://www.kilimall.co.ke'}
-        ]
+        from app.scrapers.registry import all_sites
+        default_platforms = [{'name': site.name, 'url': site.base_url} for site in all_sites()]
         for platform_data in default_platforms:
             if not Platform.query.filter_by(name=platform_data['name']).first():
                 platform = Platform(**platform_data)
                 db.session.add(platform)
+                data_versions.bump()
         db.session.commit()
+        reference_data.invalidate()
 
 class Category(db.Model):
     __tablename__ = 'categories'
@@ -28,12 +31,15 @@ class Category(db.Model):
 
     @staticmethod
     def insert_default_categories():
-        default_categories = ['Mobile Phones', 'Televisions']
+        from app.scrapers.registry import all_categories
+        default_categories = all_categories()
         for category_name in default_categories:
             if not Category.query.filter_by(name=category_name).first():
                 category = Category(name=category_name)
                 db.session.add(category)
+                data_versions.bump()
         db.session.commit()
+        reference_data.invalidate()
 
 class Product(db.Model):
     __tablename__ = 'products'
@@ -66,27 +72,22 @@ class Product(db.Model):
             'last_update': self.last_price_update.isoformat() if self.last_price_update else None
         }
     
-    def update_price(self, new_price):
+    def update_price(self, new_price, timestamp=None):
         """Update product price and price history"""
         if new_price != self.current_price:
-            # Add current price to history before updating
-            history_entry = {
-                'price': self.current_price,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            timestamp = timestamp or datetime.utcnow()
+            fmt = history_settings()['format']
             if not self.price_history:
-                self.price_history = []
-                self.price_history.append(history_entry)
+                # Add current price to history before updating
+                history_entry = make_entry(self.current_price, timestamp, fmt)
             else:
-                new_history_entry = {
-                    'price': new_price,
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-                self.price_history.append(new_history_entry)    
+                history_entry = make_entry(new_price, timestamp, fmt)
+            # Assign a new list so SQLAlchemy notices the change to the JSON column
+            self.price_history = list(self.price_history or []) + [history_entry]
                         
             # Update current price
             self.current_price = new_price
-            self.last_price_update = datetime.utcnow()
+            self.last_price_update = timestamp
 
     @property
     def formatted_price(self):
@@ -96,7 +97,100 @@ class Product(db.Model):
     def discount(self):
         """Calculate discount if both price and old_price exist"""
         if self.price_history:
-            old_price = self.price_history[-1]['price']
+            old_price = last_price(self.price_history)
             if old_price > self.current_price:
                 return round(((old_price - self.current_price) / old_price) * 100, 2)
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+class ScrapeCheckpoint(db.Model):
+    """Progress of the scraping pipeline for one platform/category crawl."""
+    __tablename__ = 'scrape_checkpoints'
+    __table_args__ = (db.UniqueConstraint('platform_id', 'category_id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    platform_id = db.Column(db.Integer, db.ForeignKey('platforms.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    last_page = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='running')
+    products_saved = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def resume_page(self):
+        """Page the next run should start from; finished crawls start over."""
+        if self.status == 'complete':
+            return 1
+        return self.last_page + 1
+
+
+class ScrapeJob(db.Model):
+    """Persistent state of the adaptive scheduler for one platform/category crawl."""
+    __tablename__ = 'scrape_jobs'
+    __table_args__ = (db.UniqueConstraint('platform_id', 'category_id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    platform_id = db.Column(db.Integer, db.ForeignKey('platforms.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    interval_minutes = db.Column(db.Float, nullable=False, default=180)
+    next_run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_run_at = db.Column(db.DateTime)
+    # Estimated fraction of the category's products changing price per hour
+    volatility = db.Column(db.Float)
+    # Exponentially decayed count of product detail views
+    views = db.Column(db.Float, nullable=False, default=0)
+    views_decayed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    runs = db.Column(db.Integer, nullable=False, default=0)
+    last_products = db.Column(db.Integer, nullable=False, default=0)
+    last_price_changes = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ProductKey(db.Model):
+    """Canonical identity of a product within its platform (see app/scrapers/identity.py)."""
+    __tablename__ = 'product_keys'
+    __table_args__ = (db.UniqueConstraint('platform_id', 'key'),)
+    id = db.Column(db.Integer, primary_key=True)
+    platform_id = db.Column(db.Integer, db.ForeignKey('platforms.id'), nullable=False)
+    key = db.Column(db.String(500), nullable=False)  # 'sku:<sku>' or 'url:<normalized url>'
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), nullable=False, index=True)
+    product = db.relationship('Product')
+
+
+class PriceChange(db.Model):
+    """Append-only log of new products and price changes, in ingest order.
+
+    Rows are written in the same transaction as the product update, and the
+    auto-incrementing id is the cursor consumers of /api/v1/changes resume from.
+    Writers hold the catalog data_versions row lock (DataVersions.lock) from
+    before their rows get ids until commit, so ids become visible in order and
+    a consumer never skips a lower id that commits later.
+    """
+    __tablename__ = 'price_changes'
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), nullable=False)
+    platform_id = db.Column(db.Integer, db.ForeignKey('platforms.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)  # 'new' or 'price'
+    old_price = db.Column(db.Float)
+    new_price = db.Column(db.Float, nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, index=True)  # when the scraper saw it
+    recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    product = db.relationship('Product')
+
+    @staticmethod
+    def prune(before):
+        """Delete log entries recorded before `before`; returns the number deleted."""
+        deleted = PriceChange.query.filter(PriceChange.recorded_at < before).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+
+class DataVersion(db.Model):
+    """Change counter for data served by the API (see app/models/versions.py)."""
+    __tablename__ = 'data_versions'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def insert_default_versions():
+        if not db.session.get(DataVersion, CATALOG):
+            db.session.add(DataVersion(name=CATALOG, version=0))
+        db.session.commit()
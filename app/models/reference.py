@@ -0,0 +1,101 @@
+import logging
+import os
+import threading
+import time
+
+from app import db
+from app.models.versions import data_versions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300  # seconds; also picks up migrations that don't bump the catalog version
+
+
+class ReferenceData:
+    """Process-wide cache of the platform and category tables as name <-> id maps.
+
+    These tables hold a handful of rows that change only when the database
+    is seeded or migrated, so they are loaded once and reloaded after
+    `invalidate()` (called by the seeding helpers), when the catalog data
+    version has moved since the last load (seeding in another process bumps
+    it, and the /categories and /platforms ETags are built from it) or when
+    the TTL expires.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else int(os.getenv('REFERENCE_DATA_TTL', DEFAULT_TTL))
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._version = None
+        self._platforms = []
+        self._categories = []
+        self._platform_ids = {}
+        self._category_ids = {}
+        self._platform_names = {}
+        self._category_names = {}
+
+    def load(self, version=None):
+        """Read both tables; must be called inside an application context."""
+        from app.models.models import Platform, Category
+
+        if version is None:
+            version = data_versions.get()
+        platforms = db.session.query(Platform.id, Platform.name).order_by(Platform.id).all()
+        categories = db.session.query(Category.id, Category.name).order_by(Category.id).all()
+        with self._lock:
+            self._platforms = [{'id': row.id, 'name': row.name} for row in platforms]
+            self._categories = [{'id': row.id, 'name': row.name} for row in categories]
+            self._platform_ids = {row.name: row.id for row in platforms}
+            self._category_ids = {row.name: row.id for row in categories}
+            self._platform_names = {row.id: row.name for row in platforms}
+            self._category_names = {row.id: row.name for row in categories}
+            self._version = version
+            self._loaded_at = time.monotonic()
+        logger.debug(f"Reference data loaded: {len(platforms)} platforms, {len(categories)} categories")
+
+    def ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None or (self.ttl and time.monotonic() - loaded_at > self.ttl):
+            self.load()
+            return
+        # Read before loading, so the tables are at least as new as this version
+        version = data_versions.get()
+        if version != self._version:
+            self.load(version)
+
+    def invalidate(self):
+        """Force a reload on next access (after seeding or migrating)."""
+        self._loaded_at = None
+
+    def platforms(self):
+        """List of {'id', 'name'} dicts for all platforms."""
+        self.ensure_loaded()
+        return self._platforms
+
+    def categories(self):
+        """List of {'id', 'name'} dicts for all categories."""
+        self.ensure_loaded()
+        return self._categories
+
+    def platform_id(self, name):
+        self.ensure_loaded()
+        return self._platform_ids.get(name)
+
+    def category_id(self, name):
+        self.ensure_loaded()
+        return self._category_ids.get(name)
+
+    def platform_name(self, platform_id):
+        self.ensure_loaded()
+        return self._platform_names.get(platform_id)
+
+    def category_name(self, category_id):
+        self.ensure_loaded()
+        return self._category_names.get(category_id)
+
+    def site_ids(self, site):
+        """(platform id, {category name: id}) for a site definition."""
+        return self.platform_id(site.name), {category: self.category_id(category) for category in site.categories}
+
+
+reference_data = ReferenceData()
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app import db
+
+CATALOG = 'catalog'  # products, prices and reference data served by the API
+DEFAULT_TTL = 1  # seconds
+
+
+class DataVersions:
+    """Process-wide cache of the data_versions counters.
+
+    Writers that change what the API serves (save_products, history
+    compaction, seeding) bump a counter in the same transaction as their
+    changes, so readers can build cheap ETags without looking at the data.
+    Reads are cached for a short TTL so a burst of requests costs one query.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('DATA_VERSION_TTL', DEFAULT_TTL))
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def get(self, name=CATALOG, bind_key=None):
+        """Current value of a counter on the primary or a bind (e.g. the read replica).
+
+        Must be called inside an application context.
+        """
+        return self.state(name, bind_key)[0]
+
+    def state(self, name=CATALOG, bind_key=None):
+        """(version, updated_at) of a counter on the primary or a bind, cached for the TTL."""
+        from app.models.models import DataVersion
+
+        cached = self._cache.get((name, bind_key))
+        if cached and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        # Explicit bind, so routed sessions still read the primary's counter
+        row = db.session.execute(select(DataVersion.version, DataVersion.updated_at).filter_by(name=name),
+                                 bind_arguments={'bind': db.engines[bind_key]}).first()
+        state = (row.version or 0, row.updated_at) if row else (0, None)
+        with self._lock:
+            self._cache[(name, bind_key)] = (state, time.monotonic())
+        return state
+
+    def lock(self, name=CATALOG):
+        """Lock a counter's row on the primary until the current transaction ends.
+
+        save_products takes it before inserting price change log rows, so
+        concurrent ingest transactions allocate log ids in commit order.
+        """
+        from app.models.models import DataVersion
+
+        db.session.execute(select(DataVersion.version).filter_by(name=name).with_for_update(),
+                           bind_arguments={'bind': db.engines[None]})
+
+    def bump(self, name=CATALOG):
+        """Increment a counter in the current transaction; the caller commits."""
+        from app.models.models import DataVersion
+
+        updated = DataVersion.query.filter_by(name=name).update(
+            {DataVersion.version: DataVersion.version + 1, DataVersion.updated_at: datetime.utcnow()},
+            synchronize_session=False)
+        if not updated:
+            db.session.add(DataVersion(name=name, version=1))
+        self.invalidate(name)
+
+    def invalidate(self, name=CATALOG):
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == name]:
+                del self._cache[key]
+
+
+data_versions = DataVersions()
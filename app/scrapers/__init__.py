@@ -1,7 +1,21 @@
-from .jumia_scraper import JumiaScraper
-from .kilimall_scraper import KilimallScraper
+import importlib
+
+# Scraper classes are imported on first use so that importing app.scrapers.registry
+# (e.g. when seeding platforms) does not pull in requests/BeautifulSoup in web processes
+_EXPORTS = {
+    'SiteScraper': '.site_scraper',
+    'JumiaScraper': '.jumia_scraper',
+    'KilimallScraper': '.kilimall_scraper'
+}
 
 __all__ = [
+    'SiteScraper',
     'JumiaScraper',
     'KilimallScraper'
 ]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,154 @@
+# app/scrapers/adaptive.py
+"""Refresh-interval policy for the adaptive scrape scheduler, plus an offline simulator.
+
+Each platform/category crawl gets an interval from two signals:
+
+- volatility: the estimated fraction of its products changing price per
+  hour, smoothed over crawls. The base interval is the time until
+  `staleness_target` of the category is expected to have changed.
+- interest: its share of recent product views. Popular categories divide
+  the base interval by up to (1 + interest_weight).
+
+Intervals are clamped to [min_interval, max_interval] and then stretched
+per retailer so the expected pages per day stay within the site's
+daily_request_budget. Each next run is jittered.
+"""
+import heapq
+import random
+from bisect import bisect_right
+from datetime import timedelta
+
+DEFAULT_SETTINGS = {
+    'min_interval': 30,           # minutes
+    'max_interval': 24 * 60,      # minutes
+    'default_interval': 180,      # minutes, until the first crawl has been observed
+    'staleness_target': 0.05,     # fraction of a category allowed to go stale between crawls
+    'interest_weight': 2.0,
+    'smoothing': 0.3,             # weight of the newest observation in the volatility average
+    'jitter': 0.1,                # +/- fraction of the interval
+    'view_half_life': 24          # hours
+}
+
+
+class AdaptivePolicy:
+    def __init__(self, **settings):
+        unknown = set(settings) - set(DEFAULT_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown scheduler settings: {', '.join(sorted(unknown))}")
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+
+    def observe(self, volatility, products, price_changes, hours):
+        """Fold one crawl's price changes into the smoothed volatility estimate."""
+        if not products or hours <= 0:
+            return volatility
+        rate = price_changes / products / hours
+        if volatility is None:
+            return rate
+        smoothing = self.settings['smoothing']
+        return smoothing * rate + (1 - smoothing) * volatility
+
+    def decay_views(self, views, hours):
+        """Apply the view half-life to a view count over `hours`."""
+        return views * 0.5 ** (hours / self.settings['view_half_life'])
+
+    def interval(self, volatility, interest_share=0.0):
+        """Refresh interval in minutes for a crawl, before the request budget is applied."""
+        settings = self.settings
+        if volatility is None:
+            minutes = settings['default_interval']
+        elif volatility <= 0:
+            minutes = settings['max_interval']
+        else:
+            minutes = settings['staleness_target'] / volatility * 60
+        minutes /= 1 + settings['interest_weight'] * interest_share
+        return min(max(minutes, settings['min_interval']), settings['max_interval'])
+
+    @staticmethod
+    def apply_budget(intervals, costs, budget):
+        """Stretch one retailer's intervals so pages fetched per day stay within its budget.
+
+        intervals and costs (pages per crawl) are dicts keyed by job; returns new intervals.
+        """
+        if not budget:
+            return dict(intervals)
+        pages_per_day = sum(costs[key] * 24 * 60 / minutes for key, minutes in intervals.items())
+        if pages_per_day <= budget:
+            return dict(intervals)
+        factor = pages_per_day / budget
+        return {key: minutes * factor for key, minutes in intervals.items()}
+
+    def next_run(self, now, minutes, rng=random):
+        """Time of the next run, jittered so crawls do not line up."""
+        jitter = self.settings['jitter']
+        return now + timedelta(minutes=minutes * (1 + rng.uniform(-jitter, jitter)))
+
+
+def interest_shares(views):
+    """Normalize view counts per job to [0, 1] relative to the most viewed job."""
+    top = max(views.values(), default=0)
+    if top <= 0:
+        return {key: 0.0 for key in views}
+    return {key: count / top for key, count in views.items()}
+
+
+def simulate(jobs, start, end, policy=None, fixed_interval=None, freshness_hours=6, seed=0):
+    """Replay historical price changes against a scheduling policy.
+
+    `jobs` maps a job key to {'changes': sorted change datetimes,
+    'products': product count, 'views': view count, 'cost': pages per crawl,
+    'platform': retailer name, 'budget': retailer pages per day}. With
+    `fixed_interval` (minutes) every job is crawled on that fixed schedule
+    instead. Returns a dict with the request cost and how quickly changes
+    would have been picked up.
+    """
+    policy = policy or AdaptivePolicy()
+    rng = random.Random(seed)
+    shares = interest_shares({key: job.get('views', 0) for key, job in jobs.items()})
+    state = {key: {'volatility': None, 'interval': fixed_interval or policy.settings['default_interval'],
+                   'last_run': start} for key in jobs}
+
+    queue = [(start + timedelta(minutes=rng.uniform(0, state[key]['interval'])), key) for key in jobs]
+    heapq.heapify(queue)
+    crawls = requests = 0
+    delays = []
+    while queue:
+        now, key = heapq.heappop(queue)
+        if now > end:
+            continue
+        job = jobs[key]
+        crawls += 1
+        requests += job['cost']
+
+        # Changes since the previous crawl are picked up now
+        changes = job['changes']
+        first = bisect_right(changes, state[key]['last_run'])
+        last = bisect_right(changes, now)
+        delays.extend((now - changed).total_seconds() / 3600 for changed in changes[first:last])
+        hours = (now - state[key]['last_run']).total_seconds() / 3600
+
+        if fixed_interval:
+            minutes = fixed_interval
+        else:
+            state[key]['volatility'] = policy.observe(state[key]['volatility'], job['products'], last - first, hours)
+            state[key]['interval'] = policy.interval(state[key]['volatility'], shares[key])
+            platform_keys = [other for other in jobs if jobs[other]['platform'] == job['platform']]
+            minutes = policy.apply_budget(
+                {other: state[other]['interval'] for other in platform_keys},
+                {other: jobs[other]['cost'] for other in platform_keys},
+                job.get('budget')
+            )[key]
+        state[key]['last_run'] = now
+        heapq.heappush(queue, (policy.next_run(now, minutes, rng), key))
+
+    total_changes = sum(
+        bisect_right(job['changes'], end) - bisect_right(job['changes'], start) for job in jobs.values())
+    delays.sort()
+    return {
+        'crawls': crawls,
+        'requests': requests,
+        'changes': total_changes,
+        'detected': len(delays),
+        'fresh': sum(1 for delay in delays if delay <= freshness_hours) / total_changes if total_changes else 1.0,
+        'mean_delay_hours': sum(delays) / len(delays) if delays else 0.0,
+        'p95_delay_hours': delays[int(len(delays) * 0.95)] if delays else 0.0
+    }
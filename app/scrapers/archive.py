@@ -0,0 +1,169 @@
+# app/scrapers/archive.py
+"""Content-addressed archive of fetched listing pages.
+
+Pages are stored once per distinct body under objects/<ab>/<sha256>.html.<ext>
+and every fetch is recorded in a daily manifest (manifests/YYYY-MM-DD.jsonl)
+with its URL, platform, category, page and fetch time. The replay CLI
+(app/scrapers/replay.py) re-runs extraction over these pages.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIONS = ('gzip', 'zstd')
+EXTENSIONS = {'gzip': 'gz', 'zstd': 'zst'}
+DEFAULT_RETENTION_DAYS = 30
+TEMP_SUFFIX = '.tmp'
+# Blobs are written before their manifest line; younger unreferenced blobs may still get one
+PRUNE_GRACE_SECONDS = 3600
+
+
+class PageArchive:
+    def __init__(self, root, compression='gzip', retention_days=DEFAULT_RETENTION_DAYS):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported archive compression: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("zstd archive compression requires the 'zstandard' package")
+
+        self.root = root
+        self.compression = compression
+        self.retention_days = retention_days
+        self.objects_dir = os.path.join(root, 'objects')
+        self.manifests_dir = os.path.join(root, 'manifests')
+        self._lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Build the archive configured by SCRAPER_ARCHIVE_* variables, or None if disabled."""
+        root = os.getenv('SCRAPER_ARCHIVE_DIR')
+        if not root:
+            return None
+        return cls(
+            root,
+            compression=os.getenv('SCRAPER_ARCHIVE_COMPRESSION', 'gzip'),
+            retention_days=int(os.getenv('SCRAPER_ARCHIVE_RETENTION_DAYS', DEFAULT_RETENTION_DAYS))
+        )
+
+    def object_path(self, digest, compression=None):
+        """Path of the blob for a digest."""
+        extension = EXTENSIONS[compression or self.compression]
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.html.{extension}")
+
+    def compress(self, data):
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    @staticmethod
+    def decompress(data, compression):
+        if compression == 'zstd':
+            if zstandard is None:
+                raise ValueError("Reading zstd archives requires the 'zstandard' package")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def store(self, html, url, platform, category, page, fetched_at=None):
+        """Archive a fetched page and record the fetch in today's manifest. Returns the digest."""
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        fetched_at = fetched_at or datetime.utcnow()
+
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=TEMP_SUFFIX)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.compress(data))
+            os.replace(tmp_path, path)
+
+        entry = {
+            'digest': digest,
+            'compression': self.compression,
+            'url': url,
+            'platform': platform,
+            'category': category,
+            'page': page,
+            'fetched_at': fetched_at.isoformat()
+        }
+        manifest = os.path.join(self.manifests_dir, f"{fetched_at:%Y-%m-%d}.jsonl")
+        with self._lock, open(manifest, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        return digest
+
+    def load(self, digest, compression=None):
+        """Read an archived page back as text."""
+        compression = compression or self.compression
+        with open(self.object_path(digest, compression), 'rb') as f:
+            return self.decompress(f.read(), compression).decode('utf-8')
+
+    def entries(self, since=None, until=None, platform=None, category=None):
+        """Yield manifest entries, oldest first, optionally filtered by date, platform and category."""
+        for filename in sorted(os.listdir(self.manifests_dir)):
+            day = filename.split('.')[0]
+            if since and day < since.strftime('%Y-%m-%d'):
+                continue
+            if until and day > until.strftime('%Y-%m-%d'):
+                continue
+            with open(os.path.join(self.manifests_dir, filename), encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    fetched_at = datetime.fromisoformat(entry['fetched_at'])
+                    if since and fetched_at < since:
+                        continue
+                    if until and fetched_at > until:
+                        continue
+                    if platform and entry['platform'] != platform:
+                        continue
+                    if category and entry['category'] != category:
+                        continue
+                    yield entry
+
+    def prune(self, retention_days=None):
+        """Drop manifests older than the retention period and blobs no manifest still references."""
+        retention_days = self.retention_days if retention_days is None else retention_days
+        cutoff = (datetime.utcnow() - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+
+        removed_manifests = 0
+        for filename in os.listdir(self.manifests_dir):
+            if filename.split('.')[0] < cutoff:
+                os.remove(os.path.join(self.manifests_dir, filename))
+                removed_manifests += 1
+
+        referenced = {entry['digest'] for entry in self.entries()}
+        recent = time.time() - PRUNE_GRACE_SECONDS
+        removed_objects = 0
+        for shard in os.listdir(self.objects_dir):
+            shard_dir = os.path.join(self.objects_dir, shard)
+            for filename in os.listdir(shard_dir):
+                # Skip blobs a concurrent writer has not renamed or recorded yet
+                if filename.endswith(TEMP_SUFFIX) or filename.split('.')[0] in referenced:
+                    continue
+                path = os.path.join(shard_dir, filename)
+                try:
+                    if os.path.getmtime(path) > recent:
+                        continue
+                    os.remove(path)
+                    removed_objects += 1
+                except FileNotFoundError:
+                    continue
+
+        logger.info(f"Archive pruned: {removed_manifests} manifests, {removed_objects} pages removed")
+        return removed_manifests, removed_objects
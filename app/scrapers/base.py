@@ -28,14 +28,14 @@ class BaseScraper(ABC):
             'Connection': 'keep-alive',
         })
 
-    def get_soup(self, url, max_retries=3, delay=2):
-        """Get BeautifulSoup object from URL with retries and rate limiting"""
+    def get_html(self, url, max_retries=3, delay=2):
+        """Get the raw HTML of a URL with retries and rate limiting"""
         for attempt in range(max_retries):
             try:
                 sleep(delay)  # Rate limiting
                 response = self.session.get(url, timeout=10)
                 response.raise_for_status()
-                return BeautifulSoup(response.text, 'html.parser')
+                return response.text
 
             except Exception as e:
                 self.logger.error(f"Attempt {attempt + 1}/{max_retries} failed: {str(e)}")
@@ -44,6 +44,13 @@ class BaseScraper(ABC):
                 sleep(delay * (attempt + 1))  # Exponential backoff
         return None
 
+    def get_soup(self, url, max_retries=3, delay=2):
+        """Get BeautifulSoup object from URL with retries and rate limiting"""
+        html = self.get_html(url, max_retries=max_retries, delay=delay)
+        if html is None:
+            return None
+        return BeautifulSoup(html, 'html.parser')
+
     @abstractmethod
     def scrape_products(self):
         """Scrape products from the platform"""
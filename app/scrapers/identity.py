@@ -0,0 +1,300 @@
+# app/scrapers/identity.py
+"""Canonical product identity and duplicate merging.
+
+A product's canonical key is its retailer SKU when one is found (on the
+product link via the site's identity.sku_attr, or in the URL via
+identity.sku_pattern), otherwise its normalized URL: absolute, without
+scheme, "www.", fragment, trailing slash or query parameters other than
+identity.keep_params. Keys are unique per platform in the product_keys table.
+
+save_products resolves keys through `product_index`, an in-memory map of
+key -> product id per platform backed by that table. Keys found or added
+during a transaction only enter the index once it commits, so a rolled back
+product id (which the database may hand out again) is never published.
+Duplicates created
+before keys existed are folded together once with:
+
+    python -m app.scrapers.identity [--dry-run]
+"""
+import argparse
+import logging
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+
+from app import db
+from app.models.history import encode_entry, history_settings, parse_entry
+from app.models.reference import reference_data
+from app.models.versions import data_versions
+from app.scrapers.registry import all_sites, get_site
+
+logger = logging.getLogger(__name__)
+
+KEY_LENGTH = 500
+PENDING_KEYS = 'product_index_pending'  # session.info entry of keys waiting for the commit
+
+
+def find_site(platform):
+    """Site definition for a platform name, or None for platforms without one."""
+    try:
+        return get_site(platform)
+    except KeyError:
+        return None
+
+
+def clean_url(url, base_url='', keep_params=()):
+    """Absolute URL without fragment, duplicate slashes or query parameters other than keep_params."""
+    url = url.strip()
+    parts = urlsplit(urljoin(base_url + '/', url) if base_url else url)
+    query = urlencode(sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if name in keep_params))
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
+
+def canonicalize(site, url, sku=None):
+    """(canonical key, cleaned URL) of a scraped product."""
+    identity = site.identity if site else {}
+    cleaned = clean_url(url, site.base_url if site else '', identity.get('keep_params', ()))
+    if not sku and identity.get('sku_pattern'):
+        match = re.search(identity['sku_pattern'], cleaned)
+        sku = match.group(1) if match else None
+    if sku:
+        return f"sku:{sku.strip()}"[:KEY_LENGTH], cleaned
+
+    parts = urlsplit(cleaned)
+    host = parts.netloc[4:] if parts.netloc.startswith('www.') else parts.netloc
+    key = f"url:{host}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+    return key[:KEY_LENGTH], cleaned
+
+
+class ProductIndex:
+    """In-memory map of canonical key -> product id per platform, used during ingest.
+
+    A platform's keys are loaded from product_keys on first use. The table
+    stays the source of truth: misses are looked up there, and hits whose
+    product no longer exists (merged by another process) are dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._platforms = {}
+
+    def keys(self, platform_id):
+        """The key -> product id map of a platform; needs an application context on first use."""
+        from app.models.models import ProductKey
+
+        index = self._platforms.get(platform_id)
+        if index is None:
+            rows = db.session.query(ProductKey.key, ProductKey.product_id).filter_by(platform_id=platform_id).all()
+            index = {row.key: row.product_id for row in rows}
+            with self._lock:
+                self._platforms[platform_id] = index
+            logger.info(f"Loaded {len(index)} product keys for platform {platform_id}")
+        return index
+
+    def add(self, platform_id, key, product_id):
+        self.keys(platform_id)[key] = product_id
+
+    def stage(self, platform_id, key, product_id):
+        """Add a key when the current transaction commits; it is dropped if the transaction rolls back."""
+        db.session.info.setdefault(PENDING_KEYS, []).append((platform_id, key, product_id))
+
+    def publish(self, entries):
+        """Add committed keys to the loaded platforms; the others read them from the table on first use."""
+        for platform_id, key, product_id in entries:
+            index = self._platforms.get(platform_id)
+            if index is not None:
+                index[key] = product_id
+
+    def discard(self, platform_id, key):
+        self.keys(platform_id).pop(key, None)
+
+    def invalidate(self):
+        with self._lock:
+            self._platforms.clear()
+
+
+product_index = ProductIndex()
+
+
+@event.listens_for(Session, 'after_commit')
+def publish_staged_keys(session):
+    product_index.publish(session.info.pop(PENDING_KEYS, ()))
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def drop_staged_keys(session, transaction):
+    if transaction.parent is None:
+        # Rolled back or closed without a commit (a commit has already published them)
+        session.info.pop(PENDING_KEYS, None)
+
+
+def resolve_products(platform_id, identities):
+    """Find the existing products for (key, cleaned url, scraped url) identities of one platform.
+
+    Returns {key: Product}. Keys are resolved through the in-memory index,
+    then product_keys, then, for products saved before keys existed, by URL;
+    missing key rows are added to the session.
+    """
+    from app.models.models import Product, ProductKey
+
+    index = product_index.keys(platform_id)
+    known = {key: index[key] for key, _, _ in identities if key in index}
+    products = {}
+    if known:
+        by_id = {product.id: product for product in Product.query.filter(Product.id.in_(set(known.values())))}
+        for key, product_id in known.items():
+            if product_id in by_id:
+                products[key] = by_id[product_id]
+            else:
+                product_index.discard(platform_id, key)
+
+    missing = {key for key, _, _ in identities if key not in products}
+    if missing:
+        rows = ProductKey.query.options(joinedload(ProductKey.product)).filter(
+            ProductKey.platform_id == platform_id, ProductKey.key.in_(missing))
+        for row in rows:
+            products[row.key] = row.product
+            product_index.stage(platform_id, row.key, row.product_id)
+
+    legacy = [(key, url, scraped_url) for key, url, scraped_url in identities if key not in products]
+    if legacy:
+        urls = {url for _, url, _ in legacy} | {scraped_url for _, _, scraped_url in legacy}
+        by_url = {}
+        for product in Product.query.filter(Product.platform_id == platform_id, Product.url.in_(urls)).order_by(Product.id):
+            by_url.setdefault(product.url, product)
+        for key, url, scraped_url in legacy:
+            product = by_url.get(url) or by_url.get(scraped_url)
+            if product and key not in products:
+                products[key] = product
+                db.session.add(ProductKey(platform_id=platform_id, key=key, product=product))
+                product_index.stage(platform_id, key, product.id)
+    return products
+
+
+def merge_history(products, fmt):
+    """Combine the price histories of several products, oldest first, without repeated points."""
+    entries = {parse_entry(entry) for product in products for entry in product.price_history or []}
+    return [encode_entry(*entry, fmt=fmt) for entry in sorted(entries, key=lambda entry: entry[0])]
+
+
+def merge_group(platform_id, key, product_ids, owner_id, fmt):
+    """Fold the products of one canonical key into the oldest (or the key's current owner).
+
+    Returns (survivor id, removed product ids).
+    """
+    from app.models.models import Product, ProductKey, PriceChange
+
+    products = Product.query.filter(Product.id.in_(product_ids)).order_by(Product.id).all()
+    survivor = next((product for product in products if product.id == owner_id), products[0])
+    latest = max(products, key=lambda product: product.last_price_update or datetime.min)
+    duplicate_ids = [product.id for product in products if product is not survivor]
+
+    survivor.price_history = merge_history(products, fmt)
+    survivor.created_at = min(product.created_at or datetime.utcnow() for product in products)
+    for column in ('name', 'url', 'image_url', 'current_price', 'currency', 'last_price_update'):
+        setattr(survivor, column, getattr(latest, column))
+
+    PriceChange.query.filter(PriceChange.product_id.in_(duplicate_ids)).update(
+        {PriceChange.product_id: survivor.id}, synchronize_session=False)
+    ProductKey.query.filter(ProductKey.product_id.in_(duplicate_ids)).update(
+        {ProductKey.product_id: survivor.id}, synchronize_session=False)
+    Product.query.filter(Product.id.in_(duplicate_ids)).delete(synchronize_session=False)
+    if owner_id is None:
+        db.session.add(ProductKey(platform_id=platform_id, key=key, product_id=survivor.id))
+    elif owner_id != survivor.id:
+        ProductKey.query.filter_by(platform_id=platform_id, key=key).update(
+            {ProductKey.product_id: survivor.id}, synchronize_session=False)
+    return survivor.id, duplicate_ids
+
+
+def follow(merged_into, product_id):
+    """Id of the product that `product_id` ended up merged into (itself if it was not)."""
+    while product_id in merged_into:
+        product_id = merged_into[product_id]
+    return product_id
+
+
+def merge_duplicates(dry_run=False, batch_size=200):
+    """Merge products sharing a canonical key and backfill product_keys for every product.
+
+    Must be called inside an application context. Returns (groups merged, products removed).
+    """
+    from app.models.models import Product, ProductKey
+
+    fmt = history_settings()['format']
+    merged = removed = 0
+    for site in all_sites():
+        platform_id = reference_data.platform_id(site.name)
+        if not platform_id:
+            continue
+        owners = dict(db.session.query(ProductKey.key, ProductKey.product_id).filter_by(platform_id=platform_id).all())
+        groups = defaultdict(list)
+        rows = db.session.query(Product.id, Product.url).filter_by(platform_id=platform_id).order_by(Product.id)
+        for product_id, url in rows.yield_per(1000):
+            groups[canonicalize(site, url)[0]].append(product_id)
+
+        # A key's owner may canonicalize to another key (e.g. its SKU came from the product
+        # link, not the URL); it is still the same product, so it joins the key's group
+        for key, owner_id in owners.items():
+            if key in groups and owner_id not in groups[key]:
+                groups[key].append(owner_id)
+
+        duplicates = {key: ids for key, ids in groups.items() if len(ids) > 1}
+        logger.info(f"{site.name}: {len(groups)} distinct products, {len(duplicates)} with duplicates")
+        if dry_run:
+            merged += len(duplicates)
+            removed += sum(len(ids) - 1 for ids in duplicates.values())
+            continue
+
+        new_keys = [{'platform_id': platform_id, 'key': key, 'product_id': ids[0]}
+                    for key, ids in groups.items() if len(ids) == 1 and key not in owners]
+        for start in range(0, len(new_keys), 1000):
+            db.session.execute(ProductKey.__table__.insert(), new_keys[start:start + 1000])
+        db.session.commit()
+
+        merged_into = {}  # removed product id -> the product it was merged into
+        for count, (key, ids) in enumerate(duplicates.items(), 1):
+            # An owner that joined two groups may already have been merged by the first
+            ids = list(dict.fromkeys(follow(merged_into, product_id) for product_id in ids))
+            owner_id = follow(merged_into, owners[key]) if key in owners else None
+            if len(ids) > 1:
+                survivor_id, duplicate_ids = merge_group(platform_id, key, ids, owner_id, fmt)
+                merged_into.update(dict.fromkeys(duplicate_ids, survivor_id))
+                merged += 1
+                removed += len(duplicate_ids)
+            if count % batch_size == 0:
+                data_versions.bump()
+                db.session.commit()
+                db.session.expunge_all()
+        if duplicates:
+            data_versions.bump()
+        db.session.commit()
+
+    product_index.invalidate()
+    return merged, removed
+
+
+def main():
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description='Merge duplicate products and backfill canonical keys')
+    parser.add_argument('--dry-run', action='store_true', help='only report how many duplicates would be merged')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        merged, removed = merge_duplicates(dry_run=args.dry_run)
+    action = 'Would merge' if args.dry_run else 'Merged'
+    print(f"{action} {merged} duplicate groups, removing {removed} products")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
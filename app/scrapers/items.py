@@ -0,0 +1,56 @@
+import sys
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+
+class ScrapedProduct(NamedTuple):
+    """One product parsed from a listing page.
+
+    A plain tuple: no per-item dict, timestamp or platform/category strings.
+    Those are shared by the ScrapedBatch that holds the product.
+    """
+    name: str
+    url: str
+    price: float
+    image_url: Optional[str] = None
+    sku: Optional[str] = None
+
+
+class ScrapedBatch:
+    """Products scraped from one platform/category crawl at one point in time.
+
+    platform_id/category_id are filled in from the reference data cache when
+    known, so saving the batch needs no lookups by name.
+    """
+    __slots__ = ('platform', 'category', 'platform_id', 'category_id', 'page', 'scraped_at', 'products')
+
+    def __init__(self, platform, category, products=None, page=None, scraped_at=None,
+                 platform_id=None, category_id=None):
+        # Interned so every batch of a crawl shares one string object
+        self.platform = sys.intern(platform)
+        self.category = sys.intern(category)
+        self.platform_id = platform_id
+        self.category_id = category_id
+        self.page = page
+        self.scraped_at = scraped_at or datetime.utcnow()
+        self.products = products if products is not None else []
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def __repr__(self):
+        return (f"<ScrapedBatch {self.platform}/{self.category} page={self.page} "
+                f"products={len(self.products)}>")
+
+    def chunks(self, size):
+        """Split into batches of at most `size` products sharing this batch's metadata."""
+        for start in range(0, len(self.products), size):
+            yield ScrapedBatch(self.platform, self.category, self.products[start:start + size],
+                               self.page, self.scraped_at, self.platform_id, self.category_id)
+
+    def extend(self, other):
+        """Append the products of another batch from the same crawl."""
+        self.products.extend(other.products)
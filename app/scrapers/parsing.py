@@ -0,0 +1,108 @@
+# app/scrapers/parsing.py
+"""Process pool for CPU-bound HTML extraction.
+
+Fetching stays in the scraper threads; the raw HTML of each page is handed to
+a worker process that runs SiteScraper.parse_page and sends back a compact
+ScrapedBatch, so parsing scales with the available cores instead of being
+serialized by the GIL. Enabled with SCRAPER_PARSE_PROCESSES (a number, or
+"auto" for one worker per available core).
+
+Workers are started with forkserver (spawn where that is unavailable), never
+by forking the parent: the pool is first used from the scraper threads, and
+forking while they hold locks (logging, connection pools) can deadlock.
+"""
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+# Per-process cache so each worker builds one scraper per site definition
+_scrapers = {}
+
+
+def available_cores():
+    """Number of cores this process may run on (respects CPU affinity/cgroup pinning)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_scraper(site):
+    """Get the worker's scraper for a site definition, rebuilding it if the definition changed."""
+    # Imported here so the pool module stays cheap to import in the parent
+    from app.scrapers.site_scraper import SiteScraper
+
+    scraper = _scrapers.get(site.name)
+    if scraper is None or scraper.site != site:
+        scraper = _scrapers[site.name] = SiteScraper(site, archive=False)
+    return scraper
+
+
+def parse_html(site, html, category, page=None, scraped_at=None):
+    """Parse a listing page in a worker process; returns a ScrapedBatch or None."""
+    return worker_scraper(site).parse_page(html, category, page=page, scraped_at=scraped_at)
+
+
+def pool_context():
+    """Multiprocessing context that does not fork the (threaded) parent process."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def run_chunk(func, items):
+    """Apply func to a chunk of items in a worker process."""
+    return [func(item) for item in items]
+
+
+class ParsePool:
+    def __init__(self, processes=None):
+        self.processes = processes or available_cores()
+        self.executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=pool_context())
+        logger.info(f"Parse pool started with {self.processes} processes")
+
+    @classmethod
+    def from_env(cls):
+        """Build the pool configured by SCRAPER_PARSE_PROCESSES, or None if parsing stays in-process."""
+        setting = os.getenv('SCRAPER_PARSE_PROCESSES', '').strip().lower()
+        if not setting or setting == '0':
+            return None
+        return cls(None if setting == 'auto' else int(setting))
+
+    def submit(self, site, html, category, page=None, scraped_at=None):
+        """Queue a page for parsing; returns a Future resolving to a ScrapedBatch or None."""
+        return self.executor.submit(parse_html, site, html, category, page, scraped_at)
+
+    def imap(self, func, iterable, chunksize=4):
+        """Lazily run a picklable function over an iterable in the pool, yielding results in order.
+
+        Only a few chunks per process are in flight at a time, so results
+        are not buffered beyond what the caller has yet to consume.
+        """
+        items = iter(iterable)
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < self.processes * 2:
+                    chunk = list(islice(items, chunksize))
+                    if not chunk:
+                        break
+                    pending.append(self.executor.submit(run_chunk, func, chunk))
+                if not pending:
+                    return
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,209 @@
+# app/scrapers/pipeline.py
+"""Streaming scrape pipeline.
+
+One producer thread per site fetches and parses listing pages and puts them on
+a bounded queue as they arrive; the writer (the calling thread, inside the app
+context) saves them in bounded batches and commits a checkpoint with each
+batch. Network fetches therefore overlap with database writes, memory is
+bounded by the queue size, and a failed run resumes from the last committed
+page instead of starting over.
+"""
+import logging
+import queue
+import threading
+
+from app import db
+from app.models.models import ScrapeCheckpoint
+from app.models.reference import reference_data
+from app.scrapers.parsing import ParsePool
+from app.scrapers.registry import all_sites
+from app.scrapers.run_scrapers import save_products
+from app.scrapers.site_scraper import SiteScraper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_QUEUE_SIZE = 8
+
+# Queue message kinds
+PAGE = 'page'
+CATEGORY_DONE = 'category_done'
+CATEGORY_FAILED = 'category_failed'
+SITE_FINISHED = 'site_finished'
+
+
+def produce_pages(site, categories, site_ids, start_pages, out_queue, cancelled, parse_pool=None):
+    """Scrape every category of a site, putting each parsed page on the queue.
+
+    `start_pages` maps categories to the (page, products already saved) a
+    resumed crawl continues from (see resume_pages). Batches are stamped
+    with the platform/category ids from `site_ids` so the writer saves them
+    without name lookups. Categories whose (platform, category) key appears
+    in `cancelled` stop early.
+    """
+    platform_id, category_ids = site_ids
+    scraper = SiteScraper(site, parse_pool=parse_pool)
+    try:
+        for index, category in enumerate(categories):
+            if index:
+                scraper.pause_between_categories()
+            try:
+                start_page, saved = start_pages.get(category, (1, 0))
+                for batch in scraper.iter_pages(category, start_page, scraped=saved):
+                    batch.platform_id = platform_id
+                    batch.category_id = category_ids.get(category)
+                    out_queue.put((PAGE, site.name, category, batch))
+                    if (site.name, category) in cancelled:
+                        break
+                else:
+                    out_queue.put((CATEGORY_DONE, site.name, category, None))
+            except Exception as e:
+                logger.error(f"Error scraping {site.name} {category}: {str(e)}")
+                out_queue.put((CATEGORY_FAILED, site.name, category, None))
+    finally:
+        out_queue.put((SITE_FINISHED, site.name, None, None))
+
+
+def get_checkpoint(platform_name, category_name):
+    """Get (or create, unsaved) the checkpoint row for a platform/category crawl."""
+    platform_id = reference_data.platform_id(platform_name)
+    category_id = reference_data.category_id(category_name)
+    if not platform_id or not category_id:
+        return None
+
+    checkpoint = ScrapeCheckpoint.query.filter_by(
+        platform_id=platform_id,
+        category_id=category_id
+    ).first()
+    if not checkpoint:
+        checkpoint = ScrapeCheckpoint(platform_id=platform_id, category_id=category_id,
+                                      last_page=0, status='running', products_saved=0)
+        db.session.add(checkpoint)
+    return checkpoint
+
+
+def resume_pages(site, categories):
+    """Map each category of a site to the page its crawl should start from and the products saved before it."""
+    start_pages = {}
+    for category in categories:
+        checkpoint = get_checkpoint(site.name, category)
+        page = checkpoint.resume_page if checkpoint else 1
+        if page > site.max_pages:
+            # The last run stopped after its final allowed page; crawl the category again
+            page = 1
+        if page > 1:
+            logger.info(f"Resuming {site.name} {category} from page {page}")
+            start_pages[category] = (page, checkpoint.products_saved or 0)
+        else:
+            start_pages[category] = (1, 0)
+    db.session.rollback()
+    return start_pages
+
+
+def write_page(batch, batch_size, crawl_stats=None):
+    """Save one scraped page in bounded batches, advancing the checkpoint with the last one.
+
+    Per-crawl product and price-change counts are added to `crawl_stats`,
+    keyed by (platform, category), once each batch is committed.
+    """
+    chunks = list(batch.chunks(batch_size)) or [batch]
+    for index, chunk in enumerate(chunks):
+        result = save_products(chunk, commit=False)
+        checkpoint = get_checkpoint(batch.platform, batch.category)
+        checkpoint.status = 'running'
+        if batch.page == 1 and index == 0:
+            checkpoint.products_saved = 0  # a crawl starting over doesn't count the previous one
+        checkpoint.products_saved = (checkpoint.products_saved or 0) + result.saved
+        if index == len(chunks) - 1:
+            checkpoint.last_page = batch.page
+        db.session.commit()
+
+        if crawl_stats is not None:
+            stats = crawl_stats.setdefault((batch.platform, batch.category), {'products': 0, 'price_changes': 0})
+            stats['products'] += result.saved
+            stats['price_changes'] += result.price_changes
+    return len(batch)
+
+
+def finish_category(platform_name, category, status):
+    """Record that a category crawl completed or failed."""
+    checkpoint = get_checkpoint(platform_name, category)
+    if not checkpoint:
+        return
+    checkpoint.status = status
+    if status == 'complete':
+        checkpoint.last_page = 0
+        checkpoint.products_saved = 0
+    db.session.commit()
+
+
+def run_pipeline(sites=None, batch_size=DEFAULT_BATCH_SIZE, queue_size=DEFAULT_QUEUE_SIZE, parse_pool=None,
+                 categories=None, crawl_stats=None):
+    """Scrape all sites concurrently and stream their pages into the database.
+
+    Must be called inside an application context. HTML is parsed in the
+    given ParsePool, or the one configured by SCRAPER_PARSE_PROCESSES, and
+    in the scraper threads otherwise. `categories` optionally restricts the
+    crawl to a set of (platform, category) keys; `crawl_stats` collects
+    per-crawl counts (see write_page). Returns the number of products written.
+    """
+    sites = sites or all_sites()
+    owns_pool = parse_pool is None
+    if owns_pool:
+        parse_pool = ParsePool.from_env()
+    try:
+        return stream_into_database(sites, batch_size, queue_size, parse_pool, categories, crawl_stats)
+    finally:
+        if owns_pool and parse_pool:
+            parse_pool.close()
+
+
+def stream_into_database(sites, batch_size, queue_size, parse_pool, categories=None, crawl_stats=None):
+    """Run the producer threads and write their pages until every site is finished."""
+    pages = queue.Queue(maxsize=queue_size)
+    failed = set()
+    producers = []
+    for site in sites:
+        site_categories = [category for category in site.categories
+                           if categories is None or (site.name, category) in categories]
+        if not site_categories:
+            continue
+        producer = threading.Thread(
+            target=produce_pages,
+            args=(site, site_categories, reference_data.site_ids(site), resume_pages(site, site_categories),
+                  pages, failed, parse_pool),
+            name=f"scraper-{site.name}",
+            daemon=True
+        )
+        producer.start()
+        producers.append(producer)
+
+    total_products = 0
+    active = len(producers)
+    while active:
+        kind, platform_name, category, batch = pages.get()
+        if kind == SITE_FINISHED:
+            active -= 1
+            continue
+        if (platform_name, category) in failed:
+            continue
+
+        try:
+            if kind == PAGE:
+                total_products += write_page(batch, batch_size, crawl_stats)
+            elif kind == CATEGORY_DONE:
+                finish_category(platform_name, category, 'complete')
+                logger.info(f"Finished {platform_name} {category}")
+            elif kind == CATEGORY_FAILED:
+                finish_category(platform_name, category, 'failed')
+        except Exception as e:
+            # Keep the checkpoint at the last committed page and stop this crawl
+            logger.error(f"Error writing {platform_name} {category} {batch!r}: {str(e)}")
+            db.session.rollback()
+            failed.add((platform_name, category))
+
+    for producer in producers:
+        producer.join()
+
+    logger.info(f"Pipeline completed. Total products processed: {total_products}")
+    return total_products
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# Bundled site definitions; extra directories can be added with SCRAPER_SITES_DIR
+SITES_DIR = os.path.join(os.path.dirname(__file__), 'sites')
+
+REQUIRED_KEYS = ('name', 'base_url', 'categories', 'selectors')
+REQUIRED_SELECTORS = ('container', 'name', 'url', 'price')
+
+
+@dataclass(frozen=True)
+class SiteDefinition:
+    """Declarative description of a retailer the generic scraper can crawl."""
+    name: str
+    base_url: str
+    categories: dict
+    selectors: dict
+    image_attrs: tuple = ('data-src', 'src')
+    image_hosts: tuple = ()
+    price: dict = field(default_factory=dict)
+    pagination: dict = field(default_factory=dict)
+    rate_limit: dict = field(default_factory=dict)
+    identity: dict = field(default_factory=dict)
+    max_products: int = 50
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a definition from parsed JSON, validating the required fields."""
+        missing = [key for key in REQUIRED_KEYS if not data.get(key)]
+        if missing:
+            raise ValueError(f"Site definition is missing {', '.join(missing)}")
+
+        missing = [key for key in REQUIRED_SELECTORS if not data['selectors'].get(key)]
+        if missing:
+            raise ValueError(f"Site {data['name']} is missing selectors: {', '.join(missing)}")
+
+        return cls(
+            name=data['name'],
+            base_url=data['base_url'].rstrip('/'),
+            categories=dict(data['categories']),
+            selectors=dict(data['selectors']),
+            image_attrs=tuple(data.get('image_attrs', cls.image_attrs)),
+            image_hosts=tuple(data.get('image_hosts', ())),
+            price=dict(data.get('price', {})),
+            pagination=dict(data.get('pagination', {})),
+            rate_limit=dict(data.get('rate_limit', {})),
+            identity=dict(data.get('identity', {})),
+            max_products=int(data.get('max_products', 50))
+        )
+
+    def category_url(self, category):
+        """Get the listing URL for a category, or None if the site does not carry it."""
+        return self.categories.get(category)
+
+    @property
+    def max_pages(self):
+        """Last listing page a crawl may fetch (1 without a pagination pattern)."""
+        if not self.pagination.get('pattern'):
+            return 1
+        return self.pagination.get('max_pages', 1)
+
+
+_registry = {}
+
+
+def load_sites(directories=None):
+    """Load every *.json site definition from the given directories into the registry."""
+    if directories is None:
+        directories = [SITES_DIR]
+        if os.getenv('SCRAPER_SITES_DIR'):
+            directories.extend(os.getenv('SCRAPER_SITES_DIR').split(os.pathsep))
+
+    sites = {}
+    for directory in directories:
+        if not os.path.isdir(directory):
+            logger.warning(f"Site definition directory not found: {directory}")
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('.json'):
+                continue
+            with open(os.path.join(directory, filename), encoding='utf-8') as f:
+                site = SiteDefinition.from_dict(json.load(f))
+            sites[site.name] = site
+
+    _registry.clear()
+    _registry.update(sites)
+    logger.info(f"Loaded {len(sites)} site definitions: {list(sites)}")
+    return list(sites.values())
+
+
+def register_site(site):
+    """Add or replace a site definition at runtime."""
+    if not _registry:
+        load_sites()
+    _registry[site.name] = site
+
+
+def all_sites():
+    """Get all registered site definitions, loading them on first use."""
+    if not _registry:
+        load_sites()
+    return list(_registry.values())
+
+
+def get_site(name):
+    """Get a site definition by platform name."""
+    if not _registry:
+        load_sites()
+    site = _registry.get(name)
+    if not site:
+        raise KeyError(f"Unknown site: {name}")
+    return site
+
+
+def all_categories():
+    """Get the category names offered by any registered site, in declaration order."""
+    categories = {}
+    for site in all_sites():
+        for category in site.categories:
+            categories.setdefault(category, None)
+    return list(categories)
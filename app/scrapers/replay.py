@@ -0,0 +1,110 @@
+# app/scrapers/replay.py
+"""Re-run product extraction over archived pages without hitting the retailers.
+
+Usage:
+    python -m app.scrapers.replay --since 2026-10-01 --platform Kilimall
+    python -m app.scrapers.replay --archive /data/pages --processes 8 --dry-run
+    python -m app.scrapers.replay --prune
+"""
+import argparse
+import logging
+import os
+from datetime import datetime
+from functools import partial
+
+from app import create_app
+from app.scrapers.archive import PageArchive
+from app.scrapers.parsing import ParsePool, available_cores, worker_scraper
+from app.scrapers.run_scrapers import save_products
+from app.scrapers.registry import get_site
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+
+# Per-process cache so each worker opens the archive once
+_archives = {}
+
+
+def parse_entry(archive_root, entry):
+    """Parse one archived page into a ScrapedBatch (runs in a worker process)."""
+    if archive_root not in _archives:
+        _archives[archive_root] = PageArchive(archive_root)
+
+    html = _archives[archive_root].load(entry['digest'], entry['compression'])
+    return worker_scraper(get_site(entry['platform'])).parse_page(
+        html,
+        entry['category'],
+        page=entry['page'],
+        scraped_at=datetime.fromisoformat(entry['fetched_at'])
+    )
+
+
+def replay(archive, since=None, until=None, platform=None, category=None,
+           processes=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Re-extract archived pages in parallel and save them oldest first.
+
+    Must be called inside an application context unless dry_run is set.
+    Returns (pages replayed, products extracted).
+    """
+    entries = list(archive.entries(since=since, until=until, platform=platform, category=category))
+    pages = products = 0
+    with ParsePool(processes) as pool:
+        logger.info(f"Replaying {len(entries)} archived pages with {pool.processes} processes")
+        # imap preserves manifest order, so older observations are written first, and
+        # yields batches as they are parsed instead of holding every page in memory
+        for entry, batch in zip(entries, pool.imap(partial(parse_entry, archive.root), entries, chunksize=4)):
+            pages += 1
+            if batch is None:
+                logger.warning(f"No products found in archived page {entry['url']} ({entry['digest'][:12]})")
+                continue
+            products += len(batch)
+            if dry_run:
+                continue
+            for chunk in batch.chunks(batch_size):
+                save_products(chunk)
+
+    logger.info(f"Replay completed: {pages} pages, {products} products")
+    return pages, products
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-run extraction over archived pages')
+    parser.add_argument('--archive', default=os.getenv('SCRAPER_ARCHIVE_DIR'),
+                        help='archive directory (default: SCRAPER_ARCHIVE_DIR)')
+    parser.add_argument('--since', type=parse_date, help='first fetch date to replay (YYYY-MM-DD)')
+    parser.add_argument('--until', type=parse_date, help='last fetch date to replay (YYYY-MM-DD)')
+    parser.add_argument('--platform', help='only replay pages of this platform')
+    parser.add_argument('--category', help='only replay pages of this category')
+    parser.add_argument('--processes', type=int, default=None,
+                        help=f'worker processes (default: all {available_cores()} cores)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help='extract without saving')
+    parser.add_argument('--prune', action='store_true', help='apply the retention policy and exit')
+    args = parser.parse_args()
+
+    if not args.archive:
+        parser.error('no archive directory given and SCRAPER_ARCHIVE_DIR is not set')
+    if args.until:
+        args.until = args.until.replace(hour=23, minute=59, second=59)
+    archive = PageArchive(args.archive,
+                          retention_days=int(os.getenv('SCRAPER_ARCHIVE_RETENTION_DAYS', 30)))
+
+    if args.prune:
+        archive.prune()
+        return
+
+    app = create_app()
+    with app.app_context():
+        replay(archive, since=args.since, until=args.until, platform=args.platform,
+               category=args.category, processes=args.processes,
+               batch_size=args.batch_size, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,73 +1,118 @@
 # app/scrapers/run_scrapers.py
 from app import create_app, db
-from app.models.models import Platform, Category, Product
-from app.scrapers.jumia_scraper import JumiaScraper
-from app.scrapers.kilimall_scraper import KilimallScraper
+from app.models.models import Product, ProductKey, PriceChange
+from app.models.reference import reference_data
+from app.models.versions import data_versions
+from app.scrapers.archive import PageArchive
+from app.scrapers.identity import canonicalize, find_site, product_index, resolve_products
 import logging
-from datetime import datetime
+from typing import NamedTuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def save_products(products, category_name):
-    """Save scraped products to the database."""
+
+class SaveResult(NamedTuple):
+    """Counts from saving one ScrapedBatch."""
+    created: int = 0
+    updated: int = 0
+    price_changes: int = 0
+    stale: int = 0
+
+    @property
+    def saved(self):
+        return self.created + self.updated
+
+
+def save_products(batch, commit=True):
+    """Save a ScrapedBatch of products to the database and return a SaveResult.
+
+    With commit=False the changes are only flushed so the caller can commit
+    them together with other work (e.g. a pipeline checkpoint).
+    """
     try:
-        category = Category.query.filter_by(name=category_name).first()
-        if not category:
-            logger.error(f"Category not found: {category_name}")
-            return
+        category_id = batch.category_id or reference_data.category_id(batch.category)
+        if not category_id:
+            logger.error(f"Category not found: {batch.category}")
+            return SaveResult()
+
+        platform_id = batch.platform_id or reference_data.platform_id(batch.platform)
+        if not platform_id:
+            logger.error(f"Platform not found: {batch.platform}")
+            return SaveResult()
         
-        platform_cache = {}
+        # Serialize change log writers so log ids are committed in order (see PriceChange)
+        data_versions.lock()
+
         products_updated = 0
         products_created = 0
-        
-        for product_data in products:
+        products_stale = 0
+        price_changes = 0
+
+        # Match products on canonical keys (SKU or normalized URL), loading them in one go
+        site = find_site(batch.platform)
+        identities = [canonicalize(site, item.url, item.sku) for item in batch.products]
+        products = resolve_products(platform_id, [(key, url, item.url)
+                                                  for (key, url), item in zip(identities, batch.products)])
+        created = []
+
+        for item, (key, url) in zip(batch.products, identities):
             try:
-                # Get platform
-                platform_name = product_data['platform']
-                if platform_name not in platform_cache:
-                    platform = Platform.query.filter_by(name=platform_name).first()
-                    if not platform:
-                        logger.error(f"Platform not found: {platform_name}")
-                        continue
-                    platform_cache[platform_name] = platform
-                platform = platform_cache[platform_name]
-                
-                # Check if product exists
-                product = Product.query.filter_by(
-                    url=product_data['url'],
-                    platform_id=platform.id
-                ).first()
-                
-                if product:
+                product = products.get(key)
+
+                if product and product.last_price_update and product.last_price_update > batch.scraped_at:
+                    # Replayed page older than what we already have; keep the newer data
+                    products_stale += 1
+                elif product:
                     # Update existing product
-                    if product.current_price != product_data['price']:
-                        product.update_price(product_data['price'])
-                    product.name = product_data['name']
-                    product.image_url = product_data.get('image_url')
-                    product.last_price_update = datetime.utcnow()
+                    if product.current_price != item.price:
+                        db.session.add(PriceChange(
+                            product=product, platform_id=platform_id, category_id=category_id, kind='price',
+                            old_price=product.current_price, new_price=item.price, changed_at=batch.scraped_at))
+                        product.update_price(item.price, batch.scraped_at)
+                        price_changes += 1
+                    product.name = item.name
+                    product.url = url
+                    product.image_url = item.image_url
+                    product.last_price_update = batch.scraped_at
                     products_updated += 1
                 else:
                     # Create new product
                     product = Product(
-                        name=product_data['name'],
-                        url=product_data['url'],
-                        image_url=product_data.get('image_url'),
-                        current_price=product_data['price'],
-                        platform=platform,
-                        category=category,
-                        last_price_update=datetime.utcnow()
+                        name=item.name,
+                        url=url,
+                        image_url=item.image_url,
+                        current_price=item.price,
+                        platform_id=platform_id,
+                        category_id=category_id,
+                        last_price_update=batch.scraped_at
                     )
                     db.session.add(product)
+                    db.session.add(ProductKey(platform_id=platform_id, key=key, product=product))
+                    db.session.add(PriceChange(
+                        product=product, platform_id=platform_id, category_id=category_id, kind='new',
+                        new_price=item.price, changed_at=batch.scraped_at))
+                    products[key] = product
+                    created.append((key, product))
                     products_created += 1
                 
             except Exception as e:
-                logger.error(f"Error processing product {product_data.get('name')}: {str(e)}")
+                logger.error(f"Error processing product {item.name}: {str(e)}")
                 continue
-        
-        db.session.commit()
-        logger.info(f"Category {category_name}: Created {products_created} products, Updated {products_updated} products")
+
+        if products_created or products_updated:
+            # Changes the API's ETags, in the same transaction as the product rows
+            data_versions.bump()
+        db.session.flush()
+        # Index new products once they are committed, reading their ids now (commit expires them)
+        for key, product in created:
+            product_index.stage(platform_id, key, product.id)
+        if commit:
+            db.session.commit()
+        logger.info(f"{batch.platform} {batch.category}: Created {products_created} products, Updated {products_updated} products"
+                    + (f", Skipped {products_stale} stale products" if products_stale else ""))
+        return SaveResult(products_created, products_updated, price_changes, products_stale)
         
     except Exception as e:
         logger.error(f"Error saving products: {str(e)}")
@@ -78,27 +123,15 @@ def run_all_scrapers():
     """Run all scrapers and save data."""
     app = create_app()
     with app.app_context():
-        # Initialize scrapers (now using unified scrapers for Jumia and Kilimall)
-        scrapers = [
-            (JumiaScraper(), "Mobile Phones"),
-            (JumiaScraper(), "Televisions"),
-            (KilimallScraper(), "Mobile Phones"),
-            (KilimallScraper(), "Televisions")
-        ]
-        
-        total_products = 0
-        # Run each scraper
-        for scraper, category in scrapers:
-            try:
-                logger.info(f"Running {scraper.__class__.__name__} for category {category}")
-                products = scraper.scrape_all()
-                if products:
-                    total_products += len(products)
-                    save_products(products, category)
-            except Exception as e:
-                logger.error(f"Error running {scraper.__class__.__name__} for category {category}: {str(e)}")
-        
-        logger.info(f"Scraping completed. Total products processed: {total_products}")
+        # Imported here because the pipeline itself depends on save_products
+        from app.scrapers.pipeline import run_pipeline
+        total_products = run_pipeline()
+
+        # Apply the raw page archive's retention policy after each run
+        archive = PageArchive.from_env()
+        if archive:
+            archive.prune()
+        return total_products
 
 if __name__ == '__main__':
     run_all_scrapers()
@@ -1,22 +1,226 @@
-from apscheduler.schedulers.background import BackgroundScheduler
-from app.scrapers.run_scrapers import run_all_scrapers
+# app/scrapers/scheduler.py
+"""Adaptive scrape scheduler.
+
+Every few minutes the scheduler crawls the platform/category jobs that are
+due and reschedules them from their observed price volatility and product
+view interest (see app/scrapers/adaptive.py), within each retailer's daily
+request budget. Job state lives in the scrape_jobs table so restarts keep
+the learned intervals.
+
+Usage:
+    python -m app.scrapers.scheduler                       # run the scheduler
+    python -m app.scrapers.scheduler --simulate --days 30  # replay history: adaptive vs fixed 3h
+"""
+import argparse
 import logging
+import random
+import time
+from datetime import datetime, timedelta
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app import create_app, db
+from app.models.history import run_compaction, parse_entry
+from app.models.models import PriceChange, Product, ScrapeJob
+from app.models.reference import reference_data
+from app.scrapers.adaptive import AdaptivePolicy, interest_shares, simulate
+from app.scrapers.pipeline import run_pipeline
+from app.scrapers.registry import all_sites
 
 # Configure logging for scheduler
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def start_scheduler():
-    """Start the APScheduler to run the scrapers periodically."""
+TICK_MINUTES = 5
+FIXED_INTERVAL = 180  # minutes; the previous every-3-hours schedule
+
+
+def site_cost(site):
+    """Pages fetched by one crawl of a category."""
+    return site.max_pages
+
+
+def sync_jobs(now=None):
+    """Make sure every registered platform/category has a job row; returns them keyed by names."""
+    now = now or datetime.utcnow()
+    jobs = {(reference_data.platform_name(job.platform_id), reference_data.category_name(job.category_id)): job
+            for job in ScrapeJob.query.all()}
+
+    for site in all_sites():
+        platform_id, category_ids = reference_data.site_ids(site)
+        for category, category_id in category_ids.items():
+            if (site.name, category) in jobs or not platform_id or not category_id:
+                continue
+            # Spread first runs of new jobs over one tick-sized window
+            job = ScrapeJob(platform_id=platform_id, category_id=category_id, interval_minutes=FIXED_INTERVAL,
+                            next_run_at=now + timedelta(seconds=random.uniform(0, TICK_MINUTES * 60)),
+                            views=0, views_decayed_at=now, runs=0, last_products=0, last_price_changes=0)
+            db.session.add(job)
+            jobs[(site.name, category)] = job
+    return jobs
+
+
+def reschedule(jobs, due, crawl_stats, policy, now):
+    """Update volatility for crawled jobs and recompute every job's interval per retailer budget."""
+    for key in due:
+        job = jobs[key]
+        stats = crawl_stats.get(key)
+        if stats:
+            hours = (now - job.last_run_at).total_seconds() / 3600 if job.last_run_at else 0
+            job.volatility = policy.observe(job.volatility, stats['products'], stats['price_changes'], hours)
+            job.last_products = stats['products']
+            job.last_price_changes = stats['price_changes']
+        job.last_run_at = now
+        job.runs = (job.runs or 0) + 1
+
+    shares = interest_shares({key: job.views for key, job in jobs.items()})
+    for site in all_sites():
+        keys = [key for key in jobs if key[0] == site.name]
+        intervals = policy.apply_budget(
+            {key: policy.interval(jobs[key].volatility, shares[key]) for key in keys},
+            {key: site_cost(site) for key in keys},
+            site.rate_limit.get('daily_request_budget')
+        )
+        for key in keys:
+            jobs[key].interval_minutes = intervals[key]
+            if key in due:
+                jobs[key].next_run_at = policy.next_run(now, intervals[key])
+
+
+def run_due_jobs(now=None, policy=None):
+    """Crawl every due job and reschedule; must run inside an application context.
+
+    Returns the keys of the jobs that were crawled.
+    """
+    policy = policy or AdaptivePolicy()
+    now = now or datetime.utcnow()
+    jobs = sync_jobs(now)
+
+    for job in jobs.values():
+        hours = (now - job.views_decayed_at).total_seconds() / 3600 if job.views_decayed_at else 0
+        job.views = policy.decay_views(job.views or 0, hours)
+        job.views_decayed_at = now
+
+    due = {key for key, job in jobs.items() if job.next_run_at <= now}
+    db.session.commit()
+    if not due:
+        return due
+
+    logger.info(f"Running {len(due)} due scrape jobs: {sorted(due)}")
+    crawl_stats = {}
+    sites = [site for site in all_sites() if any(key[0] == site.name for key in due)]
+    run_pipeline(sites=sites, categories=due, crawl_stats=crawl_stats)
+
+    reschedule(jobs, due, crawl_stats, policy, datetime.utcnow())
+    db.session.commit()
+    for key in sorted(due):
+        job = jobs[key]
+        logger.info(f"{key[0]} {key[1]}: volatility={job.volatility}, views={job.views:.1f}, "
+                    f"next run in {job.interval_minutes:.0f} min")
+    return due
+
+
+def start_scheduler(app=None):
+    """Start the APScheduler that runs due scrape jobs and daily history compaction."""
+    app = app or create_app()
     scheduler = BackgroundScheduler()
-    
-    # Add job to run the scrapers every day at midnight
-    scheduler.add_job(run_all_scrapers, 'interval', hours=3)
+
+    def tick():
+        with app.app_context():
+            try:
+                run_due_jobs()
+            except Exception as e:
+                logger.error(f"Scheduler tick failed: {str(e)}")
+                db.session.rollback()
+
+    # Check for due jobs every few minutes; one crawl at a time
+    scheduler.add_job(tick, 'interval', minutes=TICK_MINUTES, max_instances=1, coalesce=True,
+                      next_run_time=datetime.now())
+
+    # Roll old price history points into daily/weekly aggregates once a day
+    scheduler.add_job(run_compaction, 'interval', days=1)
+
+    def prune_changes():
+        with app.app_context():
+            cutoff = datetime.utcnow() - timedelta(days=app.config['CHANGE_LOG_RETENTION_DAYS'])
+            logger.info(f"Pruned {PriceChange.prune(cutoff)} change log entries")
+
+    # Drop change feed entries past their retention
+    scheduler.add_job(prune_changes, 'interval', days=1)
 
     # Start the scheduler
     scheduler.start()
 
-    logger.info("Scheduler started, scrapers will run every 3 hours.")
+    logger.info(f"Scheduler started, checking for due scrape jobs every {TICK_MINUTES} minutes.")
+    return scheduler
+
+
+def load_simulation_jobs(start, end):
+    """Build simulator inputs from stored price histories and job view counts."""
+    jobs = {}
+    for site in all_sites():
+        platform_id, category_ids = reference_data.site_ids(site)
+        for category, category_id in category_ids.items():
+            jobs[(platform_id, category_id)] = {
+                'changes': [], 'products': 0, 'views': 0, 'cost': site_cost(site),
+                'platform': site.name, 'budget': site.rate_limit.get('daily_request_budget')
+            }
+    for job in ScrapeJob.query.all():
+        if (job.platform_id, job.category_id) in jobs:
+            jobs[(job.platform_id, job.category_id)]['views'] = job.views or 0
+
+    rows = db.session.query(Product.platform_id, Product.category_id, Product.price_history).yield_per(1000)
+    for platform_id, category_id, history in rows:
+        job = jobs.get((platform_id, category_id))
+        if not job:
+            continue
+        job['products'] += 1
+        for entry in history or []:
+            changed = parse_entry(entry)[0]
+            if start <= changed <= end:
+                job['changes'].append(changed)
+
+    for job in jobs.values():
+        job['changes'].sort()
+    return jobs
+
+
+def print_simulation(days, fixed_interval):
+    end = datetime.utcnow()
+    start = end - timedelta(days=days)
+    jobs = load_simulation_jobs(start, end)
+    results = {
+        'adaptive': simulate(jobs, start, end),
+        f'fixed {fixed_interval} min': simulate(jobs, start, end, fixed_interval=fixed_interval)
+    }
+    print(f"Replaying {sum(len(job['changes']) for job in jobs.values())} price changes "
+          f"over {days} days across {len(jobs)} jobs")
+    print(f"{'policy':<18}{'requests':>10}{'fresh<=6h':>11}{'mean delay':>12}{'p95 delay':>11}")
+    for name, result in results.items():
+        print(f"{name:<18}{result['requests']:>10}{result['fresh']:>10.1%}"
+              f"{result['mean_delay_hours']:>11.1f}h{result['p95_delay_hours']:>10.1f}h")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Adaptive scrape scheduler')
+    parser.add_argument('--simulate', action='store_true', help='replay stored price history instead of scraping')
+    parser.add_argument('--days', type=int, default=30, help='history window to replay')
+    parser.add_argument('--fixed', type=int, default=FIXED_INTERVAL, help='fixed interval (minutes) to compare with')
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.simulate:
+        with app.app_context():
+            print_simulation(args.days, args.fixed)
+        return
+
+    scheduler = start_scheduler(app)
+    try:
+        while True:
+            time.sleep(60)
+    except (KeyboardInterrupt, SystemExit):
+        scheduler.shutdown()
+
 
 if __name__ == '__main__':
-    start_scheduler()
+    main()
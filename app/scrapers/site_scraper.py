@@ -0,0 +1,227 @@
+from app.scrapers.archive import PageArchive
+from app.scrapers.base import BaseScraper
+from app.scrapers.items import ScrapedBatch, ScrapedProduct
+from app.scrapers.registry import get_site
+import logging
+import random
+import re
+from datetime import datetime
+from time import sleep
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+import soupsieve
+
+PRICE_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+
+class SiteScraper(BaseScraper):
+    """Generic scraper driven by a declarative SiteDefinition."""
+
+    def __init__(self, site, archive=None, parse_pool=None):
+        if isinstance(site, str):
+            site = get_site(site)
+        self.site = site
+        self.platform = site.name
+        self.logger = logging.getLogger(__name__)
+        super().__init__(site.base_url)
+
+        # Compile selectors once per scraper instead of once per product element
+        self.selectors = {key: soupsieve.compile(selector) for key, selector in site.selectors.items()}
+        self.price_strip = tuple(site.price.get('strip', ()))
+        self.thousands_separator = site.price.get('thousands_separator', ',')
+        self.delay = site.rate_limit.get('delay', 2)
+        self.max_retries = site.rate_limit.get('max_retries', 3)
+        # Raw pages are kept for replay when SCRAPER_ARCHIVE_DIR is set; archive=False disables it
+        self.archive = archive if archive is not None else PageArchive.from_env()
+        # Optional ParsePool that moves HTML parsing to worker processes
+        self.parse_pool = parse_pool
+
+    def parse_price(self, text):
+        """Parse a price string such as 'KSh 12,999' using the site's price rules."""
+        for token in self.price_strip:
+            text = text.replace(token, '')
+        if self.thousands_separator:
+            text = text.replace(self.thousands_separator, '')
+        match = PRICE_PATTERN.search(text)
+        if not match:
+            raise ValueError(f"No price found in {text!r}")
+        return float(match.group())
+
+    def extract_product_details(self, container):
+        """Extract a ScrapedProduct from a product container."""
+        try:
+            # Product Name
+            name_elem = self.selectors['name'].select_one(container)
+            if not name_elem:
+                return None
+            name = name_elem.text.strip()
+
+            # Product URL (relative links are resolved against the site)
+            url_elem = self.selectors['url'].select_one(container)
+            if not url_elem or not url_elem.has_attr('href'):
+                return None
+            url = urljoin(self.site.base_url, url_elem['href'])
+
+            # Image URL
+            image_url = None
+            if 'image' in self.selectors:
+                img_elem = self.selectors['image'].select_one(container)
+                if img_elem:
+                    image_url = next((img_elem[attr] for attr in self.site.image_attrs if img_elem.get(attr)), None)
+
+            # Price
+            price_elem = self.selectors['price'].select_one(container)
+            if not price_elem:
+                return None
+            try:
+                price = self.parse_price(price_elem.text)
+            except (ValueError, TypeError):
+                self.logger.error(f"Error parsing price for product: {name}")
+                return None
+
+            # Retailer SKU, when the site exposes one on the product link
+            sku_attr = self.site.identity.get('sku_attr')
+            sku = url_elem.get(sku_attr) if sku_attr else None
+
+            return ScrapedProduct(name, url, price, image_url, sku)
+
+        except Exception as e:
+            self.logger.error(f"Error extracting product: {str(e)}")
+            return None
+
+    def page_urls(self, category, start_page=1):
+        """Yield (page number, URL) pairs for a category following the pagination pattern."""
+        url = self.site.category_url(category)
+        if not url:
+            return
+        if start_page <= 1:
+            yield 1, url
+
+        pattern = self.site.pagination.get('pattern')
+        for page in range(max(start_page, 2), self.site.max_pages + 1):
+            yield page, pattern.format(url=url, page=page)
+
+    def fetch_pages(self, category, start_page=1):
+        """Yield (page number, HTML) for each listing page, archiving it when enabled."""
+        for page, url in self.page_urls(category, start_page):
+            self.logger.info(f"Scraping {category} page {page} from {url}")
+            html = self.get_html(url, max_retries=self.max_retries, delay=self.delay)
+            if not html:
+                return
+            if self.archive:
+                try:
+                    self.archive.store(html, url, self.platform, category, page)
+                except OSError as e:
+                    self.logger.error(f"Error archiving {url}: {str(e)}")
+            yield page, html
+
+    def parse_in_pool(self, category, start_page=1, scraped=0):
+        """Yield parsed pages in order while the next page is fetched during parsing.
+
+        The next page is not fetched while the page being parsed is expected
+        (from the size of the previous page) to reach max_products, counting
+        the `scraped` products of earlier runs, so the overlap does not cost
+        an extra request at the end of a crawl.
+        """
+        pages = self.fetch_pages(category, start_page)
+        pending = None
+        last_size = 0
+        try:
+            while True:
+                if pending is not None and last_size and scraped + last_size >= self.site.max_products:
+                    batch, pending = pending.result(), None
+                else:
+                    fetched = next(pages, None)
+                    if fetched is None:
+                        break
+                    page, html = fetched
+                    batch = None
+                    previous, pending = pending, self.parse_pool.submit(self.site, html, category, page,
+                                                                        scraped_at=datetime.utcnow())
+                    if previous is None:
+                        continue
+                    batch = previous.result()
+                yield batch
+                if batch is None:
+                    return
+                scraped += len(batch)
+                last_size = len(batch)
+            if pending is not None:
+                batch, pending = pending.result(), None
+                yield batch
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    def iter_pages(self, category, start_page=1, scraped=0):
+        """Yield a ScrapedBatch for each listing page as soon as it is parsed.
+
+        A resumed crawl passes the number of products its earlier runs
+        `scraped`, which count towards the site's max_products.
+        """
+        if not self.site.category_url(category):
+            self.logger.error(f"Unknown category for {self.platform}: {category}")
+            return
+        if scraped >= self.site.max_products:
+            return
+
+        if self.parse_pool:
+            batches = self.parse_in_pool(category, start_page, scraped)
+        else:
+            batches = (self.parse_page(html, category, page)
+                       for page, html in self.fetch_pages(category, start_page))
+
+        for batch in batches:
+            if batch is None:
+                return
+            remaining = self.site.max_products - scraped
+            if len(batch) > remaining:
+                del batch.products[remaining:]
+
+            scraped += len(batch)
+            yield batch
+            if scraped >= self.site.max_products:
+                return
+
+    def parse_page(self, html, category, page=None, scraped_at=None):
+        """Extract a ScrapedBatch from the HTML of a listing page.
+
+        Returns None when the page has no product containers (end of listing
+        or a broken container selector). Does no I/O, so archived pages can
+        be re-parsed by the replay CLI.
+        """
+        soup = BeautifulSoup(html, 'html.parser')
+        product_containers = self.selectors['container'].select(soup)
+        if not product_containers:
+            return None
+
+        batch = ScrapedBatch(self.platform, category, page=page, scraped_at=scraped_at)
+        for container in product_containers:
+            product = self.extract_product_details(container)
+            if product:
+                batch.products.append(product)
+        return batch
+
+    def scrape_products(self, category):
+        """Scrape products from a given category into a single ScrapedBatch."""
+        products = ScrapedBatch(self.platform, category)
+        try:
+            for batch in self.iter_pages(category):
+                products.extend(batch)
+        except Exception as e:
+            self.logger.error(f"Error scraping {category}: {str(e)}")
+        return products
+
+    def pause_between_categories(self):
+        """Sleep for the site's configured pause between category crawls."""
+        low, high = self.site.rate_limit.get('category_pause', (2, 4))
+        sleep(random.uniform(low, high))
+
+    def scrape_all(self):
+        """Scrape every category declared for the site, one ScrapedBatch per category."""
+        batches = []
+        for index, category in enumerate(self.site.categories):
+            if index:
+                self.pause_between_categories()
+            batches.append(self.scrape_products(category))
+        return batches
@@ -20,14 +20,29 @@ function formatPrice(price) {
     }).format(price);
 }
 
+// Content-hashed static URLs rendered by base.html, plain paths as fallback
+function staticUrl(path) {
+    return (window.STATIC_URLS && window.STATIC_URLS[path]) || `/static/${path}`;
+}
+
 // Platform logos mapping
 const platformLogos = {
-    'Jumia': '/static/media/jumia-logo.png',
-    'Kilimall': '/static/media/kilimall-logo.png'
+    'Jumia': staticUrl('media/jumia-logo.png'),
+    'Kilimall': staticUrl('media/kilimall-logo.png')
 };
 
 // Default placeholder image
-const placeholderImage = '/static/media/placeholder.png';
+const placeholderImage = staticUrl('media/placeholder.png');
+
+// Retry a failed thumbnail with the retailer's image, then fall back to the placeholder
+function imageFallback(img) {
+    const original = img.dataset.original;
+    img.dataset.original = '';
+    img.src = original || placeholderImage;
+    if (!original) {
+        img.onerror = null;
+    }
+}
 
 // API Functions
 async function fetchAPI(endpoint) {
@@ -103,7 +118,7 @@ async function loadProducts(page = 1, append = false, search = '') {
             const col = document.createElement('div');
             col.className = 'col-md-6 col-lg-4 mb-4';
 
-            const imageUrl = product.image_url || placeholderImage;
+            const imageUrl = product.thumbnail_url || product.image_url || placeholderImage;
 
             col.innerHTML = `
                 <div class="card product-card">
@@ -111,7 +126,9 @@ async function loadProducts(page = 1, append = false, search = '') {
                         <img src="${imageUrl}" 
                              class="card-img-top" 
                              alt="${product.name}"
-                             onerror="this.src='${placeholderImage}'">
+                             loading="lazy"
+                             data-original="${product.thumbnail_url ? product.image_url : ''}"
+                             onerror="imageFallback(this)">
                     </div>  
                     <div class="card-body">
                         <h5 class="card-title text-truncate" title="${product.name}">${product.name}</h5>
@@ -198,14 +215,15 @@ async function loadPriceHistory(productId) {
         // Update product details section
         const detailsContainer = document.getElementById('productDetails');
         if (detailsContainer) {
-            const imageUrl = product.image_url || '/static/media/placeholder.png';
+            const imageUrl = product.thumbnail_url || product.image_url || placeholderImage;
             detailsContainer.innerHTML = `
                 <div class="text-center mb-3">
                     <img src="${imageUrl}" 
                          alt="${product.name}" 
                          class="img-fluid" 
                          style="max-height: 200px;"
-                         onerror="this.src='/static/media/placeholder.png'">
+                         data-original="${product.thumbnail_url ? product.image_url : ''}"
+                         onerror="imageFallback(this)">
                 </div>
                 <h6>${product.name}</h6>
                 <p class="mb-1">Current Price: ${formatPrice(product.current_price)}</p>
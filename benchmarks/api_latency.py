@@ -0,0 +1,138 @@
+"""Compare latency of the previous ORM-hydrating API handlers with the unified ones.
+
+The legacy handlers below are copies of the ones that used to live in
+app/routes.py, mounted under /legacy so both run against the same database
+(and the same JSON provider, so the difference is the query work).
+
+Usage: python -m benchmarks.api_latency [--products 5000] [--requests 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy.orm import joinedload
+
+from app import create_app, db
+from app.models.models import Product, Category
+
+legacy = Blueprint('legacy', __name__, url_prefix='/legacy/api/v1')
+
+
+@legacy.route('/products')
+def legacy_products():
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 12, type=int)
+    query = Product.query.order_by(Product.updated_at.desc())
+    search = request.args.get('search')
+    if search:
+        query = query.filter(Product.name.ilike(f'%{search}%'))
+    products = query.paginate(page=page, per_page=per_page, error_out=False)
+    return jsonify({
+        'items': [{
+            'id': p.id,
+            'name': p.name,
+            'url': p.url,
+            'image_url': p.image_url,
+            'platform': p.platform.name,
+            'current_price': p.current_price,
+            'currency': p.currency,
+            'last_update': p.last_price_update.isoformat() if p.last_price_update else None
+        } for p in products.items],
+        'page': products.page,
+        'total_pages': products.pages,
+        'has_next': products.has_next
+    })
+
+
+@legacy.route('/products/<int:id>')
+def legacy_product(id):
+    product = Product.query.options(joinedload(Product.platform)).get(id)
+    return jsonify({
+        'id': product.id,
+        'name': product.name,
+        'url': product.url,
+        'image_url': product.image_url,
+        'platform': product.platform.name,
+        'current_price': product.current_price,
+        'currency': product.currency,
+        'price_history': product.price_history or [],
+        'last_update': product.last_price_update.isoformat() if product.last_price_update else None
+    })
+
+
+@legacy.route('/categories')
+def legacy_categories():
+    categories = Category.query.all()
+    return jsonify([{'id': c.id, 'name': c.name} for c in categories])
+
+
+def seed(count):
+    """Insert `count` products with a short price history."""
+    rows = []
+    now = datetime.utcnow().isoformat()
+    for i in range(count):
+        rows.append({
+            'name': f"Product {i}",
+            'url': f"https://example.com/p/{i}",
+            'image_url': f"https://example.com/i/{i}.jpg",
+            'current_price': 1000.0 + i,
+            'currency': 'KES',
+            'price_history': [{'price': 900.0 + j, 'timestamp': now} for j in range(10)],
+            'last_price_update': datetime.utcnow(),
+            'created_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow(),
+            'platform_id': 1 + i % 2,
+            'category_id': 1 + i % 2
+        })
+    db.session.execute(Product.__table__.insert(), rows)
+    db.session.commit()
+
+
+def time_requests(client, paths, repeat):
+    """Return per-request latencies in milliseconds."""
+    latencies = []
+    for _ in range(repeat):
+        for path in paths:
+            start = time.perf_counter()
+            response = client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, (path, response.status_code)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        app.register_blueprint(legacy)
+        with app.app_context():
+            seed(args.products)
+
+        client = app.test_client()
+        ids = random.Random(1).sample(range(1, args.products + 1), 20)
+        scenarios = {
+            'listing (per_page=50)': ['/api/v1/products?per_page=50&page={}'.format(p) for p in range(1, 6)],
+            'detail': ['/api/v1/products/{}'.format(i) for i in ids],
+            'categories': ['/api/v1/categories']
+        }
+
+        print(f"{'endpoint':<24}{'legacy p50':>12}{'new p50':>10}{'speedup':>9}")
+        for name, paths in scenarios.items():
+            repeat = max(1, args.requests // len(paths))
+            time_requests(client, paths + ['/legacy' + p for p in paths], 1)  # warm up
+            old = statistics.median(time_requests(client, ['/legacy' + p for p in paths], repeat))
+            new = statistics.median(time_requests(client, paths, repeat))
+            print(f"{name:<24}{old:>10.2f}ms{new:>8.2f}ms{old / new:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
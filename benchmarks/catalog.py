@@ -0,0 +1,170 @@
+"""Fill the database with a synthetic product catalog for load testing.
+
+Products are spread over the registered platforms and categories with
+plausible names, retailer-style URLs and a random-walk price history per
+product: each product has its own change frequency and first-seen date, so
+history lengths range from a few points to years of changes. Histories are
+compacted with the configured retention tiers unless --raw is given, so the
+rows look like a production table after the daily compaction job.
+
+Usage: python -m benchmarks.catalog --database-url URL [--products 100000] [--years 3]
+       [--seed 0] [--raw]
+
+Rows are written with bulk executemany inserts in chunks of --chunk-size.
+"""
+import argparse
+import math
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from app import create_app, db
+from app.models.history import compact_history, history_settings, make_entry
+from app.models.models import Product
+from app.models.reference import reference_data
+from app.scrapers.registry import all_sites
+
+# Name parts and a (low, high) KES price range per category
+CATALOG = {
+    'Mobile Phones': {
+        'brands': ['Samsung', 'Tecno', 'Infinix', 'Xiaomi', 'Oppo', 'Nokia', 'Itel', 'Apple', 'Realme', 'Vivo'],
+        'models': ['Galaxy A15', 'Spark 20', 'Hot 40i', 'Redmi 13C', 'A18', 'G42', 'A70', 'iPhone 13',
+                   'Note 50', 'Y28', 'Camon 30', 'Smart 8'],
+        'specs': ['64GB + 4GB RAM', '128GB + 6GB RAM', '256GB + 8GB RAM', 'Dual SIM 4G', '5G 6.7"',
+                  '5000mAh', '50MP Camera'],
+        'colours': ['Black', 'Blue', 'Green', 'Gold', 'Silver', 'Purple'],
+        'prices': (6000, 180000)
+    },
+    'Televisions': {
+        'brands': ['Hisense', 'TCL', 'Vitron', 'Samsung', 'LG', 'Sony', 'Skyworth', 'Syinix', 'Gld', 'Amtec'],
+        'models': ['Smart TV', 'Frameless Android TV', 'Digital TV', 'QLED Google TV', 'UHD 4K TV',
+                   'Crystal UHD', 'NanoCell'],
+        'specs': ['24"', '32"', '40"', '43"', '50"', '55"', '65"', '75"'],
+        'colours': ['Black', 'Grey'],
+        'prices': (9000, 350000)
+    }
+}
+GENERIC = {
+    'brands': ['Generic', 'Nova', 'Apex', 'Zen', 'Orbit'],
+    'models': ['Classic', 'Pro', 'Lite', 'Max', 'Plus'],
+    'specs': ['Standard', 'Large', 'Compact'],
+    'colours': ['Black', 'White'],
+    'prices': (500, 50000)
+}
+
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def price_walk(rng, start, end, base_price, mean_days):
+    """Yield (timestamp, price) points of a random walk with occasional promotions."""
+    timestamp, price = start, base_price
+    promo_until = None
+    while timestamp <= end:
+        yield timestamp, price
+        timestamp += timedelta(days=rng.expovariate(1 / mean_days))
+        if promo_until and timestamp >= promo_until:
+            price, promo_until = base_price, None
+        elif rng.random() < 0.1:
+            # Flash sale: 10-35% off for a few days, then back to the list price
+            price = round(base_price * rng.uniform(0.65, 0.9))
+            promo_until = timestamp + timedelta(days=rng.uniform(1, 7))
+        else:
+            base_price = max(round(base_price * math.exp(rng.gauss(0, 0.04))), 100)
+            price = base_price
+
+
+def generate_products(count, years=3, seed=0, compact=True, now=None, offset=0):
+    """Yield product row dicts for a bulk insert; needs an app context for ids and settings."""
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    settings = history_settings()
+    fmt = settings['format']
+    targets = []
+    for site in all_sites():
+        platform_id, category_ids = reference_data.site_ids(site)
+        for category, category_id in category_ids.items():
+            if platform_id and category_id:
+                targets.append((site, category, platform_id, category_id))
+    if not targets:
+        raise RuntimeError("No platforms/categories seeded; is the registry empty?")
+
+    for i in range(offset, offset + count):
+        site, category, platform_id, category_id = targets[i % len(targets)]
+        parts = CATALOG.get(category, GENERIC)
+        name = (f"{rng.choice(parts['brands'])} {rng.choice(parts['models'])} "
+                f"{rng.choice(parts['specs'])} - {rng.choice(parts['colours'])}")
+        sku = f"{site.name[:2].upper()}{i:08d}"
+        low, high = parts['prices']
+        base_price = round(math.exp(rng.uniform(math.log(low), math.log(high))))
+
+        # Most products were first seen recently; a long tail has years of history
+        first_seen = now - timedelta(days=min(rng.expovariate(1 / (years * 365 / 4)), years * 365))
+        mean_days = math.exp(rng.uniform(math.log(0.5), math.log(60)))
+        points = list(price_walk(rng, first_seen, now, base_price, mean_days))
+        history = [make_entry(price, timestamp, fmt) for timestamp, price in points]
+        if compact:
+            history = compact_history(history, now=now, raw_days=settings['raw_days'],
+                                      daily_days=settings['daily_days'], weekly_days=settings['weekly_days'],
+                                      fmt=fmt)
+        last_update, current_price = points[-1]
+
+        yield {
+            'name': name,
+            'url': f"{site.base_url}/{slugify(name)}-{sku}.html",
+            'image_url': f"{site.base_url}/images/{sku}.jpg",
+            'current_price': float(current_price),
+            'currency': 'KES',
+            'price_history': history,
+            'last_price_update': last_update,
+            'created_at': first_seen,
+            'updated_at': last_update,
+            'platform_id': platform_id,
+            'category_id': category_id
+        }
+
+
+def generate_catalog(count, years=3, seed=0, compact=True, chunk_size=1000):
+    """Bulk insert `count` synthetic products; needs an app context. Returns the number inserted."""
+    # Continue numbering after existing rows so repeated runs do not reuse URLs
+    offset = db.session.query(func.max(Product.id)).scalar() or 0
+    inserted = 0
+    chunk = []
+    for row in generate_products(count, years, seed, compact, offset=offset):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            db.session.execute(Product.__table__.insert(), chunk)
+            db.session.commit()
+            inserted += len(chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(Product.__table__.insert(), chunk)
+        db.session.commit()
+        inserted += len(chunk)
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='target database (default: DATABASE_URL)')
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--years', type=float, default=3, help='longest price history')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--raw', action='store_true', help='keep every price point instead of compacting')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = create_app(args.database_url)
+    with app.app_context():
+        start = time.perf_counter()
+        inserted = generate_catalog(args.products, args.years, args.seed, not args.raw, args.chunk_size)
+        elapsed = time.perf_counter() - start
+        print(f"Inserted {inserted} products in {elapsed:.1f}s ({inserted / elapsed:.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Scripted load test of the read API: latency percentiles and SQL queries per request.
+
+Runs listing, search, detail and stats requests through the Flask app
+in-process and reports p50/p95/p99 latency, SQL statements per request and
+errors for each endpoint. Endpoints that fail during warm-up are reported as
+skipped rather than timed. With an empty database a synthetic catalog is
+generated first (see benchmarks/catalog.py).
+
+Usage: python -m benchmarks.load_test [--database-url URL] [--products 100000]
+       [--requests 500] [--seed 0]
+
+Without --database-url a temporary SQLite database is used. For PostgreSQL,
+point --database-url at a local scratch database.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models.models import Product
+from app.models.reference import reference_data
+from benchmarks.catalog import CATALOG, generate_catalog
+
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self.on_execute)
+
+    def on_execute(self, *args):
+        self.count += 1
+
+
+def scenario_paths(rng, product_ids, platform_ids, category_ids, count):
+    """Request paths per endpoint, drawn like real traffic would be."""
+    terms = [word for parts in CATALOG.values() for word in parts['brands'] + parts['models']]
+    return {
+        'listing': [
+            f"/api/v1/products?page={rng.randint(1, 20)}&per_page={rng.choice([12, 12, 24, 50])}"
+            f"&platform_id={rng.choice(platform_ids + ['all'])}&category_id={rng.choice(category_ids + ['all'])}"
+            for _ in range(count)],
+        'search': [f"/api/v1/products?search={rng.choice(terms)}" for _ in range(count)],
+        'detail': [f"/api/v1/products/{rng.choice(product_ids)}" for _ in range(count)],
+        'stats': ['/api/v1/stats'] * max(count // 10, 1)
+    }
+
+
+def percentile(cuts, p):
+    return cuts[p - 1] if cuts else 0.0
+
+
+def run_scenario(client, counter, paths):
+    """Request each path once; returns (latencies in ms, queries per request, errors)."""
+    latencies, queries, errors = [], [], 0
+    for path in paths:
+        before = counter.count
+        start = time.perf_counter()
+        response = client.get(path)
+        latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count - before)
+        if response.status_code != 200:
+            errors += 1
+    return latencies, queries, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='database to test (default: temporary SQLite)')
+    parser.add_argument('--products', type=int, default=100000, help='catalog size to generate when empty')
+    parser.add_argument('--requests', type=int, default=500, help='requests per endpoint (stats gets a tenth)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(args.database_url or 'sqlite:///' + os.path.join(tmp, 'load.db'))
+        with app.app_context():
+            if not db.session.query(Product.id).first():
+                start = time.perf_counter()
+                generate_catalog(args.products, seed=args.seed)
+                print(f"Generated {args.products} products in {time.perf_counter() - start:.1f}s")
+            product_ids = [row.id for row in db.session.query(Product.id)]
+            platform_ids = [platform['id'] for platform in reference_data.platforms()]
+            category_ids = [category['id'] for category in reference_data.categories()]
+            counter = QueryCounter(db.engine)
+
+        rng = random.Random(args.seed)
+        scenarios = scenario_paths(rng, product_ids, platform_ids, category_ids, args.requests)
+        client = app.test_client()
+
+        print(f"{len(product_ids)} products, {args.requests} requests per endpoint")
+        print(f"{'endpoint':<10}{'requests':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'queries':>9}{'errors':>8}")
+        for name, paths in scenarios.items():
+            # Warm up; an endpoint that fails outright is reported once instead of timed
+            failure = next((response for response in map(client.get, paths[:5]) if response.status_code != 200), None)
+            if failure is not None:
+                detail = (failure.get_json(silent=True) or {}).get('error', '')
+                print(f"{name:<10}skipped: {paths[0]} returned {failure.status_code} {detail}".rstrip())
+                continue
+            latencies, queries, errors = run_scenario(client, counter, paths)
+            cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            print(f"{name:<10}{len(paths):>9}{percentile(cuts, 50):>8.1f}ms{percentile(cuts, 95):>8.1f}ms"
+                  f"{percentile(cuts, 99):>8.1f}ms{statistics.mean(queries):>9.1f}{errors:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Compare the memory held by scraped products as dicts vs ScrapedBatch/ScrapedProduct.
+
+Usage: python -m benchmarks.scraped_items_memory [--products 200000]
+"""
+import argparse
+import tracemalloc
+from datetime import datetime
+
+from app.scrapers.items import ScrapedBatch, ScrapedProduct
+
+
+def make_fields(count):
+    """Pre-build the per-product strings so both layouts share them."""
+    return [(f"Phone model {i}", f"https://www.jumia.co.ke/phone-{i}.html", 10000.0 + i,
+             f"https://ke.jumia.is/phone-{i}.jpg") for i in range(count)]
+
+
+def as_dicts(fields):
+    """The previous layout: one dict per product with its own timestamp."""
+    return [{
+        'platform': 'Jumia',
+        'name': name,
+        'url': url,
+        'price': price,
+        'image_url': image_url,
+        'category': 'Mobile Phones',
+        'timestamp': datetime.now()
+    } for name, url, price, image_url in fields]
+
+
+def as_batch(fields):
+    """The compact layout: tuples sharing one batch timestamp and interned names."""
+    return ScrapedBatch('Jumia', 'Mobile Phones',
+                        [ScrapedProduct(name, url, price, image_url) for name, url, price, image_url in fields])
+
+
+def measure(build, fields):
+    """Return the bytes allocated (and still held) by build(fields)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(fields)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=200000)
+    args = parser.parse_args()
+
+    fields = make_fields(args.products)
+    dict_bytes = measure(as_dicts, fields)
+    batch_bytes = measure(as_batch, fields)
+
+    print(f"products:          {args.products:,}")
+    print(f"dict per product:  {dict_bytes / 1024 / 1024:8.1f} MiB ({dict_bytes / args.products:.0f} B/item)")
+    print(f"ScrapedBatch:      {batch_bytes / 1024 / 1024:8.1f} MiB ({batch_bytes / args.products:.0f} B/item)")
+    print(f"reduction:         {100 * (1 - batch_bytes / dict_bytes):8.1f} %")
+
+
+if __name__ == '__main__':
+    main()
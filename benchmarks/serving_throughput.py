@@ -0,0 +1,137 @@
+"""Concurrent read throughput of the sync (gunicorn wsgi:app) and async (app.asgi) serving modes.
+
+Starts each server on a local port against the same database, then keeps
+`--concurrency` clients requesting listing, detail and category endpoints
+for `--seconds`, and reports requests per second and latency.
+
+Usage: python -m benchmarks.serving_throughput [--database-url URL] [--products 5000]
+       [--workers 2] [--concurrency 32] [--seconds 10]
+
+Without --database-url a temporary SQLite database is seeded. The async mode
+needs the packages in requirements-asgi.txt.
+"""
+import argparse
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from app import create_app
+from benchmarks.api_latency import seed
+
+MODES = {
+    'sync (gunicorn)': ['gunicorn', 'wsgi:app', '--workers', '{workers}', '--bind', '127.0.0.1:{port}'],
+    'async (uvicorn)': ['uvicorn', 'app.asgi:app', '--workers', '{workers}', '--port', '{port}', '--log-level', 'warning']
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(command, database_url, workers):
+    """Start a server process and wait until it answers; returns (process, base url)."""
+    port = free_port()
+    args = [part.format(workers=workers, port=port) for part in command]
+    env = dict(os.environ, DATABASE_URL=database_url)
+    process = subprocess.Popen(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{args[0]} exited with {process.returncode}")
+        try:
+            requests.get(base_url + '/api/v1/categories', timeout=1)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{args[0]} did not start on port {port}")
+
+
+def run_load(base_url, paths, concurrency, seconds):
+    """Hammer the server from `concurrency` threads; returns (latencies in ms, errors)."""
+    latencies = []
+    errors = []
+    stop_at = time.monotonic() + seconds
+    lock = threading.Lock()
+
+    def client(seed_value):
+        rng = random.Random(seed_value)
+        session = requests.Session()
+        mine, failed = [], 0
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                response = session.get(base_url + rng.choice(paths), timeout=30)
+                if response.status_code != 200:
+                    failed += 1
+            except requests.RequestException:
+                failed += 1
+            mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='existing database to serve (default: seeded temporary SQLite)')
+    parser.add_argument('--products', type=int, default=5000, help='products to seed into the temporary database')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url
+        if not database_url:
+            database_url = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            app = create_app(database_url)
+            with app.app_context():
+                seed(args.products)
+
+        ids = random.Random(1).sample(range(1, args.products + 1), min(50, args.products))
+        paths = ([f'/api/v1/products?page={page}' for page in range(1, 11)]
+                 + [f'/api/v1/products?search=Product {i}' for i in range(1, 10)]
+                 + [f'/api/v1/products/{i}' for i in ids]
+                 + ['/api/v1/categories'])
+
+        print(f"{args.concurrency} clients, {args.workers} workers, {args.seconds:.0f}s per mode")
+        print(f"{'mode':<18}{'req/s':>9}{'p50':>10}{'p95':>10}{'errors':>8}")
+        for name, command in MODES.items():
+            try:
+                process, base_url = start_server(command, database_url, args.workers)
+            except (OSError, RuntimeError) as e:
+                print(f"{name:<18} skipped: {e}", file=sys.stderr)
+                continue
+            try:
+                run_load(base_url, paths, args.concurrency, 1)  # warm up
+                latencies, errors = run_load(base_url, paths, args.concurrency, args.seconds)
+            finally:
+                process.terminate()
+                process.wait()
+            latencies.sort()
+            p95 = latencies[int(len(latencies) * 0.95)]
+            print(f"{name:<18}{len(latencies) / args.seconds:>9.1f}{statistics.median(latencies):>8.1f}ms"
+                  f"{p95:>8.1f}ms{errors:>8}")
+
+
+if __name__ == '__main__':
+    main()
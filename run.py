@@ -2,7 +2,6 @@ import os
 import sys
 from app import create_app, db
 from app.models.models import Platform, Category
-from app.scrapers.run_scrapers import run_all_scrapers
 import logging
 
 # Configure logging
@@ -22,7 +21,7 @@ def init_db():
     with app.app_context():
         try:
             # Create all tables
-            db.create_all()
+            db.create_all(bind_key=None)
 
             # Initialize platforms and categories
             Platform.insert_default_platforms()
@@ -45,6 +44,8 @@ if __name__ == '__main__':
         init_db()  # Initialize database
         sys.exit(0)
     
+    from app.scrapers.run_scrapers import run_all_scrapers
+
     init_db()  # Initialize database before running the app
     run_all_scrapers()  # Run scrapers once
     app.run(debug=True)  # Start the Flask app
\ No newline at end of file
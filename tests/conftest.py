@@ -0,0 +1,42 @@
+import pytest
+
+from app import create_app, db
+from app import db_routing
+from app.models.reference import reference_data
+from app.models.versions import data_versions
+from app.scrapers.identity import product_index
+
+
+def reset_caches():
+    """Clear the process-wide caches so every test starts from its own database."""
+    data_versions._cache.clear()
+    reference_data.invalidate()
+    product_index.invalidate()
+    db_routing._unavailable_until = 0
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'primary.db'}"
+
+
+@pytest.fixture
+def replica_url():
+    """No read replica; tests of replica routing override this."""
+    return None
+
+
+@pytest.fixture
+def app(database_url, replica_url):
+    reset_caches()
+    app = create_app(database_url=database_url, replica_url=replica_url)
+    app.config['TESTING'] = True
+    yield app
+    with app.app_context():
+        db.session.remove()
+    reset_caches()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
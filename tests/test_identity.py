@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.models import PriceChange, Product, ProductKey
+from app.models.reference import reference_data
+from app.scrapers.identity import merge_duplicates
+from app.scrapers.items import ScrapedBatch, ScrapedProduct
+from app.scrapers.run_scrapers import save_products
+
+PLATFORM = 'Jumia'
+CATEGORY = 'Mobile Phones'
+BASE_URL = 'https://www.jumia.co.ke'
+
+
+@pytest.fixture
+def ctx(app):
+    with app.app_context():
+        yield
+
+
+def batch(*products, scraped_at=None):
+    items = [ScrapedProduct(name, BASE_URL + path, price) for name, path, price in products]
+    return ScrapedBatch(PLATFORM, CATEGORY, items, scraped_at=scraped_at)
+
+
+def legacy_product(path, price, created_at):
+    """A product saved before canonical keys existed (no product_keys row)."""
+    product = Product(name=path, url=BASE_URL + path, current_price=price,
+                      platform_id=reference_data.platform_id(PLATFORM),
+                      category_id=reference_data.category_id(CATEGORY),
+                      last_price_update=created_at, created_at=created_at)
+    db.session.add(product)
+    db.session.flush()
+    db.session.add(PriceChange(product=product, platform_id=product.platform_id, category_id=product.category_id,
+                               kind='new', new_price=price, changed_at=created_at))
+    return product
+
+
+def key_owner(key):
+    return ProductKey.query.filter_by(platform_id=reference_data.platform_id(PLATFORM), key=key).one().product_id
+
+
+def test_rolled_back_products_are_not_indexed(ctx):
+    save_products(batch(('Phone A', '/phone-a-1.html', 100)), commit=False)
+    db.session.rollback()
+
+    # The database hands the rolled back id out again
+    assert save_products(batch(('Phone B', '/phone-b-2.html', 200))).created == 1
+    result = save_products(batch(('Phone A', '/phone-a-1.html', 110)))
+
+    assert (result.created, result.updated) == (1, 0)
+    phone_b = db.session.get(Product, key_owner('sku:2'))
+    assert (phone_b.name, phone_b.current_price) == ('Phone B', 200)
+    assert key_owner('sku:1') != phone_b.id
+
+
+def test_committed_products_are_found_through_the_index(ctx):
+    save_products(batch(('Phone A', '/phone-a-1.html', 100)))
+    result = save_products(batch(('Phone A', '/phone-a-1.html', 90)))
+
+    assert (result.created, result.updated, result.price_changes) == (0, 1, 1)
+    assert Product.query.count() == 1
+
+
+def test_merge_duplicates_folds_products_with_the_same_key(ctx):
+    now = datetime.utcnow()
+    first = legacy_product('/phone-a-1.html?utm_source=x', 100, now - timedelta(days=2))
+    second = legacy_product('/phone-a-1.html/', 90, now - timedelta(days=1))
+    other = legacy_product('/phone-b-2.html', 50, now)
+    db.session.commit()
+    first_id, second_id, other_id = first.id, second.id, other.id
+
+    assert merge_duplicates(dry_run=True) == (1, 1)
+    assert Product.query.count() == 3
+
+    assert merge_duplicates() == (1, 1)
+    assert {product.id for product in Product.query} == {first_id, other_id}
+    survivor = db.session.get(Product, first_id)
+    assert survivor.current_price == 90  # the most recently updated duplicate's data
+    assert survivor.created_at == now - timedelta(days=2)
+    assert {change.product_id for change in PriceChange.query} == {first_id, other_id}
+    assert key_owner('sku:1') == first_id
+    assert key_owner('sku:2') == other_id
+    assert db.session.get(Product, second_id) is None
+
+
+def test_merge_duplicates_keeps_a_key_owner_that_canonicalizes_elsewhere(ctx):
+    now = datetime.utcnow()
+    save_products(batch(('Phone B', '/phone-b-2.html', 100), scraped_at=now - timedelta(days=2)))
+    owner_id = key_owner('sku:2')
+    # The owner's URL changed after its key was assigned, and an older copy has the original URL
+    db.session.get(Product, owner_id).url = BASE_URL + '/phone-b-renamed-3.html'
+    legacy_product('/phone-b-2.html', 95, now - timedelta(days=1))
+    db.session.commit()
+
+    assert merge_duplicates() == (1, 1)
+    assert [product.id for product in Product.query] == [owner_id]
+    assert key_owner('sku:2') == owner_id
+
+    result = save_products(batch(('Phone B', '/phone-b-2.html', 80)))
+    assert (result.created, result.updated) == (0, 1)
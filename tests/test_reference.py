@@ -0,0 +1,26 @@
+from sqlalchemy import create_engine, text
+
+from app.models.versions import data_versions
+
+
+def seed_category_elsewhere(database_url, name):
+    """Add a category and bump the catalog version the way another process's seeding would."""
+    engine = create_engine(database_url)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO categories (name) VALUES (:name)"), {'name': name})
+        connection.execute(text("UPDATE data_versions SET version = version + 1 WHERE name = 'catalog'"))
+    engine.dispose()
+
+
+def test_categories_reload_when_the_catalog_version_moves(app, client, database_url):
+    first = client.get('/api/v1/categories')
+    assert first.status_code == 200
+
+    seed_category_elsewhere(database_url, 'Gadgets')
+    with app.app_context():
+        data_versions.invalidate()  # as when the version cache's TTL expires
+
+    second = client.get('/api/v1/categories', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert 'Gadgets' in [category['name'] for category in second.get_json()]
@@ -0,0 +1,50 @@
+import shutil
+
+import pytest
+
+from app import db
+from app.models.models import Product
+from app.scrapers.items import ScrapedBatch, ScrapedProduct
+from app.scrapers.run_scrapers import save_products
+
+PRODUCT_URL = 'https://www.jumia.co.ke/phone-a-1.html'
+
+
+@pytest.fixture
+def replica_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'replica.db'}"
+
+
+def save_price(price):
+    save_products(ScrapedBatch('Jumia', 'Mobile Phones', [ScrapedProduct('Phone A', PRODUCT_URL, price)]))
+
+
+def replicate(app, tmp_path):
+    """Bring the replica up to date by copying the primary's SQLite file."""
+    with app.app_context():
+        db.engines[None].dispose()
+    shutil.copy(tmp_path / 'primary.db', tmp_path / 'replica.db')
+
+
+def test_etag_is_built_from_the_version_of_the_database_serving_the_request(app, client, tmp_path):
+    with app.app_context():
+        save_price(100)
+        product_id = Product.query.one().id
+    replicate(app, tmp_path)
+    with app.app_context():
+        save_price(90)  # not replicated yet; the replica is still within REPLICA_MAX_LAG_SECONDS
+    url = f'/api/v1/products/{product_id}'
+
+    stale = client.get(url)
+    replica_version = int(stale.headers['X-Data-Version'])
+    assert stale.get_json()['current_price'] == 100
+    assert stale.headers['ETag'].startswith(f'"v{replica_version}-')
+    assert client.get(url, headers={'If-None-Match': stale.headers['ETag']}).status_code == 304
+
+    # A client that has seen the newer version is served by the primary, and its old tag no longer matches
+    fresh = client.get(url, headers={'If-None-Match': stale.headers['ETag'],
+                                     'X-Data-Version': str(replica_version + 1)})
+    assert fresh.status_code == 200
+    assert fresh.get_json()['current_price'] == 90
+    assert fresh.headers['ETag'].startswith(f'"v{replica_version + 1}-')
+    assert fresh.headers['X-Data-Version'] == str(replica_version + 1)
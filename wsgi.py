@@ -0,0 +1,9 @@
+"""Slim WSGI entry point for the web app and API.
+
+Unlike run.py this imports no scraper code; scraping runs in its own
+process (python -m app.scrapers.scheduler). For the async read API see
+app/asgi.py.
+"""
+from app import create_app
+
+app = create_app()